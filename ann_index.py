@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Approximate nearest-neighbour index over chunk vectors for semantic search
+- Backends: hnswlib (`pip install hnswlib`), faiss-hnsw / faiss-ivf
+  (`pip install faiss-cpu`), exact (brute force, hybrid_search.py)
+- Built by api_server in a background thread after each papers.json reload;
+  searches use the exact scorer until the index is ready
+- The search width (ef_search / nprobe) is fixed when the index is built, so
+  concurrent searches never change shared index state (HNSW backends use
+  max(ef_search, k) for larger candidate requests on their own)
+- A query fetches the top candidate chunks, maps them to papers and rescores
+  those papers exactly (hybrid score over all their chunks)
+- Libraries below BRUTE_FORCE_BELOW chunks always use the exact scorer
+- `python ann_index.py report` prints build params/time, latency and recall@k vs exact
+"""
+
+import time
+import argparse
+
+import numpy as np
+
+from hybrid_search import hybrid_scores, top_k_papers
+
+BACKENDS = ["auto", "hnswlib", "faiss-hnsw", "faiss-ivf", "exact"]
+BRUTE_FORCE_BELOW = 50_000  # 청크 수가 이보다 적으면 전수 계산이 더 빠르고 정확
+CANDIDATES_PER_RESULT = 10  # 결과 1개당 후보 청크 수
+MIN_CANDIDATES = 200
+
+DEFAULT_PARAMS = {
+    "M": 16,                 # HNSW: 노드당 이웃 수
+    "ef_construction": 200,  # HNSW: 빌드 시 탐색 폭
+    "ef_search": 256,        # HNSW: 검색 시 탐색 폭 (후보 수보다 작으면 라이브러리가 후보 수로 올림)
+    "nlist": None,           # IVF: 리스트 수 (None = 4·sqrt(n))
+    "nprobe": 16,            # IVF: 검색할 리스트 수
+}
+
+
+def available_backend() -> str:
+    """First installed ANN library, or 'exact'"""
+    try:
+        import hnswlib  # noqa: F401
+        return "hnswlib"
+    except ImportError:
+        pass
+    try:
+        import faiss  # noqa: F401
+        return "faiss-hnsw"
+    except ImportError:
+        return "exact"
+
+
+class ChunkIndex:
+    """Inner-product ANN index over L2-normalised chunk vectors (row id = chunk id)"""
+
+    def __init__(self, unit: np.ndarray, backend: str = "auto", **params):
+        if backend == "auto":
+            backend = available_backend()
+        if backend not in BACKENDS[1:-1]:
+            raise ValueError(f"Not an ANN backend: {backend}")
+        self.backend = backend
+        self.params = {**DEFAULT_PARAMS, **{k: v for k, v in params.items() if v is not None}}
+        self.size = len(unit)
+
+        start = time.perf_counter()
+        vectors = np.ascontiguousarray(unit, dtype=np.float32)
+        dim = vectors.shape[1]
+        if backend == "hnswlib":
+            import hnswlib
+            self._index = hnswlib.Index(space="ip", dim=dim)
+            self._index.init_index(max_elements=len(vectors), M=self.params["M"],
+                                   ef_construction=self.params["ef_construction"], random_seed=42)
+            self._index.add_items(vectors, np.arange(len(vectors)))
+        else:
+            import faiss
+            if backend == "faiss-hnsw":
+                self._index = faiss.IndexHNSWFlat(dim, self.params["M"], faiss.METRIC_INNER_PRODUCT)
+                self._index.hnsw.efConstruction = self.params["ef_construction"]
+            else:
+                nlist = self.params["nlist"] or max(1, int(4 * np.sqrt(len(vectors))))
+                self.params["nlist"] = nlist
+                self._index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+                self._index.train(vectors)
+            self._index.add(vectors)
+        self.set_search_width(self.params[search_knob(backend)])
+        self.build_seconds = time.perf_counter() - start
+
+    def set_search_width(self, width: int):
+        """Set ef_search (HNSW) / nprobe (IVF); not thread-safe, only at build time or offline"""
+        self.params[search_knob(self.backend)] = width
+        if self.backend == "hnswlib":
+            self._index.set_ef(width)
+        elif self.backend == "faiss-hnsw":
+            self._index.hnsw.efSearch = width
+        else:
+            self._index.nprobe = width
+
+    def search(self, query: np.ndarray, n_candidates: int) -> np.ndarray:
+        """Chunk ids of the n_candidates approximate nearest chunks"""
+        n_candidates = min(n_candidates, self.size)
+        query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+        # 공유 인덱스의 상태(ef/nprobe)는 바꾸지 않음: 동시 검색에 안전
+        if self.backend == "hnswlib":
+            labels, _ = self._index.knn_query(query, k=n_candidates)
+        else:
+            _, labels = self._index.search(query, n_candidates)
+        labels = labels[0]
+        return labels[labels >= 0].astype(np.int64)
+
+    def describe(self) -> dict:
+        """Backend and build parameters, for logs and /api/semantic-search/stats"""
+        return {"backend": self.backend, "chunks": self.size,
+                "build_seconds": round(self.build_seconds, 2), **self.params}
+
+
+def candidate_scores(unit: np.ndarray, offsets: np.ndarray, query: np.ndarray, chunk_ids: np.ndarray) -> np.ndarray:
+    """Exact hybrid scores for the papers owning chunk_ids; -inf for every other paper"""
+    scores = np.full(len(offsets) - 1, -np.inf, dtype=np.float32)
+    papers = np.unique(np.searchsorted(offsets, chunk_ids, side="right") - 1)
+    if not len(papers):
+        return scores
+
+    # 후보 논문의 청크 행만 모아 같은 (행렬, offsets) 형태로 다시 계산
+    counts = offsets[papers + 1] - offsets[papers]
+    sub_offsets = np.zeros(len(papers) + 1, dtype=np.int64)
+    sub_offsets[1:] = np.cumsum(counts)
+    rows = np.repeat(offsets[papers] - sub_offsets[:-1], counts) + np.arange(sub_offsets[-1])
+    scores[papers] = hybrid_scores(unit[rows], sub_offsets, query)
+    return scores
+
+
+def search_scores(unit: np.ndarray, offsets: np.ndarray, query: np.ndarray, top_k: int,
+                  index: ChunkIndex = None) -> np.ndarray:
+    """Per-paper hybrid scores: exact without an index, candidate-rescored with one"""
+    if index is None:
+        return hybrid_scores(unit, offsets, query)
+    n_candidates = max(top_k * CANDIDATES_PER_RESULT, MIN_CANDIDATES)
+    return candidate_scores(unit, offsets, query, index.search(query, n_candidates))
+
+
+def build_index(unit: np.ndarray, backend: str = "auto", min_chunks: int = BRUTE_FORCE_BELOW, **params):
+    """ChunkIndex, or None when the library is small or no ANN library is installed"""
+    if backend == "exact" or unit is None or len(unit) < min_chunks:
+        return None
+    if backend == "auto" and available_backend() == "exact":
+        return None
+    return ChunkIndex(unit, backend, **params)
+
+
+def search_knob(backend: str) -> str:
+    """Parameter that trades latency for recall at query time"""
+    return "nprobe" if backend == "faiss-ivf" else "ef_search"
+
+
+def recall_report(unit: np.ndarray, offsets: np.ndarray, backend: str, k: int = 10, n_queries: int = 200,
+                  widths: list = None, seed: int = 42, **params) -> dict:
+    """Build time, per-query latency and recall@k of ANN vs exact for each search width
+
+    Queries are chunk vectors sampled from the library itself, so no model is needed.
+    """
+    rng = np.random.default_rng(seed)
+    queries = unit[rng.choice(len(unit), size=min(n_queries, len(unit)), replace=False)]
+
+    exact, exact_times = [], []
+    for q in queries:
+        start = time.perf_counter()
+        exact.append(set(top_k_papers(hybrid_scores(unit, offsets, q), k).tolist()))
+        exact_times.append(time.perf_counter() - start)
+
+    index = ChunkIndex(unit, backend, **params)
+    report = {"index": index.describe(), "papers": len(offsets) - 1, "queries": len(queries), "k": k,
+              "exact_ms": float(np.median(exact_times) * 1000), "runs": []}
+    knob = search_knob(index.backend)
+    for width in widths or [index.params[knob]]:
+        index.set_search_width(width)
+        recalls, times = [], []
+        for q, truth in zip(queries, exact):
+            start = time.perf_counter()
+            found = top_k_papers(search_scores(unit, offsets, q, k, index), k)
+            times.append(time.perf_counter() - start)
+            recalls.append(len(truth & set(found.tolist())) / max(len(truth), 1))
+        report["runs"].append({
+            knob: width,
+            f"recall@{k}": float(np.mean(recalls)),
+            "min_recall": float(np.min(recalls)),
+            "median_ms": float(np.median(times) * 1000),
+            "p99_ms": float(np.percentile(times, 99) * 1000),
+        })
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ANN index build/recall report")
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("--papers", default="papers.json")
+    parser.add_argument("--backend", choices=BACKENDS[:-1], default="auto")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--M", type=int, default=DEFAULT_PARAMS["M"])
+    parser.add_argument("--ef-construction", type=int, default=DEFAULT_PARAMS["ef_construction"])
+    parser.add_argument("--sweep", type=int, nargs="+", default=None,
+                        help="ef_search values (HNSW) or nprobe values (faiss-ivf) to compare")
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, default=DEFAULT_PARAMS["nprobe"])
+    args = parser.parse_args()
+
+    from paper_index import PaperIndex
+
+    snapshot = PaperIndex(args.papers).get()
+    if snapshot.embeddings is None:
+        raise SystemExit(f"No embeddings in {args.papers}. Run build_map.py first.")
+    backend = available_backend() if args.backend == "auto" else args.backend
+    if backend == "exact":
+        raise SystemExit("No ANN library installed: pip install hnswlib (or faiss-cpu)")
+
+    knob = search_knob(backend)
+    sweep = args.sweep or ([4, 8, 16, 32] if knob == "nprobe" else [200, 300, 500, 800])
+    report = recall_report(snapshot.embeddings, snapshot.offsets, backend, args.k, args.queries,
+                           sweep, M=args.M, ef_construction=args.ef_construction,
+                           nlist=args.nlist, nprobe=args.nprobe)
+    print(f"{report['papers']:,} papers, {report['queries']} queries, index: {report['index']}")
+    print(f"exact: {report['exact_ms']:.1f} ms/query")
+    for run in report["runs"]:
+        print(f"{knob}={run[knob]:<5} recall@{args.k} {run[f'recall@{args.k}']:.3f} "
+              f"(min {run['min_recall']:.2f})  {run['median_ms']:.1f} ms median, {run['p99_ms']:.1f} ms p99")
@@ -28,6 +28,10 @@ sync_status = {
     "progress": None  # {"current": 50, "total": 337}
 }
 
+from papers_io import write_papers_json
+from paper_index import PaperIndex
+from query_cache import QueryEmbeddingCache
+from batch_encoder import BatchEncoder, EncoderTimeout
 from zotero_api import (
     get_zotero_client,
     add_tags_to_item,
@@ -55,6 +59,10 @@ if env_path.exists():
 app = Flask(__name__)
 CORS(app)
 
+# papers.json parsed once per change and shared by all requests (see paper_index.py)
+PAPERS_PATH = Path(__file__).parent / "papers.json"
+paper_index = PaperIndex(PAPERS_PATH)
+
 # API Key authentication
 API_KEY = os.environ.get("APP_API_KEY")
 
@@ -197,13 +205,9 @@ def run_cluster_sync_background():
     try:
         update_sync_progress(1, "Loading papers data...")
 
-        # Load papers.json
-        papers_path = Path(__file__).parent / "papers.json"
-        with open(papers_path, 'r', encoding='utf-8') as f:
-            papers_data = json.load(f)
-
-        papers = papers_data.get('papers', [])
-        cluster_labels = papers_data.get('cluster_labels', {})
+        snapshot = paper_index.get()
+        papers = snapshot.papers
+        cluster_labels = snapshot.cluster_labels
 
         update_sync_progress(1, "Fetching Zotero items...")
         zot = get_zotero_client()
@@ -283,12 +287,8 @@ def sync_cluster_tags_legacy():
         prefix = data.get('prefix', 'cluster:')
         cluster_labels = data.get('cluster_labels', {})
 
-        # Load papers.json to get cluster mapping
-        papers_path = Path(__file__).parent / "papers.json"
-        with open(papers_path, 'r', encoding='utf-8') as f:
-            papers_data = json.load(f)
-
-        papers = papers_data.get('papers', papers_data)
+        # Cluster mapping from the shared paper index
+        papers = paper_index.get().papers
 
         zot = get_zotero_client()
         results = {"success": 0, "failed": 0, "skipped": 0}
@@ -347,6 +347,10 @@ def update_sync_progress(step, detail=None, current=None, total=None):
         sync_status["progress"] = None
 
 
+# Full sync keeps existing map positions/clusters and only places new papers (build_map.py --place-new)
+SYNC_PLACE_NEW = os.environ.get("SYNC_PLACE_NEW", "false").lower() == "true"
+
+
 def run_full_sync_background():
     """Background task for full sync"""
     global sync_status
@@ -364,8 +368,12 @@ def run_full_sync_background():
         update_sync_progress(1, "Starting build_map.py...")
         print("Starting full sync: building papers.json from Zotero API...")
 
+        command = ["python", "-u", "build_map.py", "--source", "api", "--embedding", "multi", "--all", "--incremental",
+                   "--embedding-sidecar", "float32"]
+        if SYNC_PLACE_NEW:
+            command.append("--place-new")
         process = subprocess.Popen(
-            ["python", "-u", "build_map.py", "--source", "api", "--embedding", "multi", "--all"],
+            command,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
@@ -424,9 +432,8 @@ def run_full_sync_background():
 
         # Step 2: Load papers.json for cluster and tag sync
         update_sync_progress(2, "Loading papers data...")
-        papers_path = Path(__file__).parent / "papers.json"
-        with open(papers_path, 'r', encoding='utf-8') as f:
-            papers_data = json.load(f)
+        papers_path = PAPERS_PATH
+        papers_data = paper_index.load_mutable()  # private copy: this job rewrites papers.json
 
         papers = papers_data.get('papers', [])
         cluster_labels = papers_data.get('cluster_labels', {})
@@ -665,8 +672,7 @@ def run_full_sync_background():
 
         # Save updated papers.json
         update_sync_progress(7, "Saving papers.json...")
-        with open(papers_path, 'w', encoding='utf-8') as f:
-            json.dump(papers_data, f, ensure_ascii=False, indent=2)
+        write_papers_json(papers_path, papers_data)
         print("Saved updated papers.json with citation_links and reference_cache")
 
         print("Full sync completed!")
@@ -724,9 +730,8 @@ def run_citations_sync_background():
 
         # Step 1: Load papers.json
         update_sync_progress(1, "Loading papers data...")
-        papers_path = Path(__file__).parent / "papers.json"
-        with open(papers_path, 'r', encoding='utf-8') as f:
-            papers_data = json.load(f)
+        papers_path = PAPERS_PATH
+        papers_data = paper_index.load_mutable()  # private copy: this job rewrites papers.json
 
         papers = papers_data.get('papers', [])
 
@@ -927,8 +932,7 @@ def run_citations_sync_background():
 
         # Save updated papers.json
         update_sync_progress(4, "Saving papers.json...")
-        with open(papers_path, 'w', encoding='utf-8') as f:
-            json.dump(papers_data, f, ensure_ascii=False, indent=2)
+        write_papers_json(papers_path, papers_data)
         print("Saved updated papers.json")
 
         print("Citations sync completed!")
@@ -979,32 +983,76 @@ def citations_sync():
 # Lazy-loaded model for semantic search
 _semantic_model = None
 
+# Inference backend: torch (fp32) or onnx-int8 (quantized ONNX copy, see embedding_backend.py)
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", "torch")
+EMBED_MODEL_DIR = os.environ.get("EMBED_MODEL_DIR") or None
+SEMANTIC_MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+# Normalised query vectors, shared by repeated/concurrent searches (see query_cache.py)
+query_cache = QueryEmbeddingCache(int(os.environ.get("QUERY_CACHE_SIZE", 1024)))
+
 def get_semantic_model():
     """Lazy load sentence transformer model"""
     global _semantic_model
     if _semantic_model is None:
-        from sentence_transformers import SentenceTransformer
-        _semantic_model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+        from embedding_backend import load_sentence_model
+        _semantic_model = load_sentence_model(SEMANTIC_MODEL_NAME, EMBED_BACKEND, EMBED_MODEL_DIR)
     return _semantic_model
 
 
-def compute_hybrid_score(query_norm, paper_embeddings, alpha=0.6, top_k_mean=3):
-    """Compute hybrid score: α * max + (1-α) * mean(top_k)"""
+# Concurrent cache misses are encoded together in one model call (see batch_encoder.py)
+query_encoder = BatchEncoder(
+    lambda texts: get_semantic_model().encode(texts),
+    max_wait_ms=float(os.environ.get("QUERY_BATCH_WAIT_MS", 5)),
+    max_batch=int(os.environ.get("QUERY_BATCH_SIZE", 32)),
+    timeout=float(os.environ.get("QUERY_ENCODE_TIMEOUT", 60)),
+)
+
+
+def encode_query(query):
+    """Unit-length query embedding"""
     import numpy as np
 
-    # Normalize paper embeddings
-    emb_array = np.array(paper_embeddings)
-    emb_norms = emb_array / np.linalg.norm(emb_array, axis=1, keepdims=True)
+    query_emb = np.asarray(query_encoder.encode(query), dtype=np.float32)
+    return query_emb / np.linalg.norm(query_emb)
+
+
+# Optional ANN index over the snapshot's chunk vectors (see ann_index.py), rebuilt after each reload
+ANN_BACKEND = os.environ.get("ANN_BACKEND", "auto")
+ANN_MIN_CHUNKS = int(os.environ.get("ANN_MIN_CHUNKS", 50_000))
+_chunk_index = {"snapshot": None, "index": None, "building": None}
+_chunk_index_lock = threading.Lock()
+
+def _build_chunk_index(snapshot):
+    """Background thread: build the ANN index for one snapshot"""
+    from ann_index import build_index
 
-    # Cosine similarities for all chunks
-    sims = np.dot(emb_norms, query_norm)
+    try:
+        index = build_index(snapshot.embeddings, ANN_BACKEND, ANN_MIN_CHUNKS)
+        if index is not None:
+            print(f"ANN index built: {index.describe()}")
+    except Exception as e:
+        print(f"ANN index build failed, using brute force: {e}")
+        index = None
+    with _chunk_index_lock:
+        # 빌드 중에 새 스냅샷이 들어왔으면 이 결과는 버림
+        if _chunk_index["building"] is snapshot:
+            _chunk_index.update(snapshot=snapshot, index=index, building=None)
 
-    # Hybrid: max + top-k mean
-    max_sim = np.max(sims)
-    top_k_sims = np.sort(sims)[::-1][:top_k_mean]
-    mean_sim = np.mean(top_k_sims)
 
-    return alpha * max_sim + (1 - alpha) * mean_sim
+def get_chunk_index(snapshot):
+    """ChunkIndex for this snapshot, or None (still building / small library / no ANN library)
+
+    Never blocks: the first call for a new snapshot starts the build in the
+    background and searches are scored exactly until it finishes.
+    """
+    with _chunk_index_lock:
+        if _chunk_index["snapshot"] is snapshot:
+            return _chunk_index["index"]
+        if _chunk_index["building"] is not snapshot:
+            _chunk_index["building"] = snapshot
+            threading.Thread(target=_build_chunk_index, args=(snapshot,), name="ann-index", daemon=True).start()
+        return None
 
 
 @app.route('/api/semantic-search', methods=['GET'])
@@ -1018,8 +1066,15 @@ def semantic_search():
     Supports both:
         - Legacy: 'embedding' (single vector)
         - Multi-vector: 'embeddings' (list of vectors) with hybrid scoring
+          α * max + (1-α) * mean(top-3), vectorized over all chunks (hybrid_search.py)
+    Vectors come from the shared paper index (papers.json or, when
+    meta.embedding_store is 'sidecar', the memory-mapped papers.embeddings.<id>.npy).
+    Large libraries take candidate chunks from an ANN index (ANN_BACKEND) and
+    rescore their papers exactly; small ones are scored exhaustively.
     """
-    import numpy as np
+    from hybrid_search import top_k_papers
+    from ann_index import search_scores
+    from embedding_backend import cache_key
 
     query = request.args.get('q', '').strip()
     if not query:
@@ -1028,52 +1083,23 @@ def semantic_search():
     top_k = int(request.args.get('top_k', 20))
 
     try:
-        # Load papers with embeddings
-        papers_path = Path(__file__).parent / "papers.json"
-        with open(papers_path, 'r', encoding='utf-8') as f:
-            papers_data = json.load(f)
-
-        papers = papers_data.get('papers', [])
-
-        # Check which format: multi-vector or legacy
-        use_multi_vector = any(p.get('embeddings') for p in papers)
+        snapshot = paper_index.get()
+        use_multi_vector = snapshot.multi_vector
 
-        if use_multi_vector:
-            # Multi-vector mode with hybrid scoring
-            papers_with_emb = [(i, p) for i, p in enumerate(papers) if p.get('embeddings')]
-        else:
-            # Legacy mode (single embedding)
-            papers_with_emb = [(i, p) for i, p in enumerate(papers) if p.get('embedding')]
-
-        if not papers_with_emb:
+        if snapshot.embeddings is None or not len(snapshot.embeddings):
             return jsonify({"error": "No embeddings found. Run build_map.py first."}), 500
 
-        # Encode query
-        model = get_semantic_model()
-        query_emb = model.encode([query])[0]
-        query_norm = query_emb / np.linalg.norm(query_emb)
-
-        # Compute similarities
-        similarities = []
-        if use_multi_vector:
-            # Hybrid scoring for multi-vector
-            for _, paper in papers_with_emb:
-                score = compute_hybrid_score(query_norm, paper['embeddings'])
-                similarities.append(score)
-        else:
-            # Legacy: single vector cosine similarity
-            embeddings = np.array([p['embedding'] for _, p in papers_with_emb])
-            emb_norms = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
-            similarities = np.dot(emb_norms, query_norm).tolist()
-
-        similarities = np.array(similarities)
+        # Encode query (cached per model + query string)
+        query_norm = query_cache.get(cache_key(SEMANTIC_MODEL_NAME, EMBED_BACKEND), query, encode_query)
 
-        # Get top K
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        # One matmul over every chunk (or over the ANN candidates' papers);
+        # single-vector papers are the 1-chunk case
+        index = get_chunk_index(snapshot)
+        similarities = search_scores(snapshot.embeddings, snapshot.offsets, query_norm, top_k, index)
 
         results = []
-        for idx in top_indices:
-            orig_idx, paper = papers_with_emb[idx]
+        for idx in top_k_papers(similarities, top_k):
+            paper = snapshot.papers[idx]
             results.append({
                 "id": paper["id"],
                 "title": paper.get("title", ""),
@@ -1087,9 +1113,82 @@ def semantic_search():
         return jsonify({
             "query": query,
             "results": results,
-            "mode": "multi-vector" if use_multi_vector else "legacy"
+            "mode": "multi-vector" if use_multi_vector else "legacy",
+            "index": index.backend if index is not None else "exact"
         })
 
+    except EncoderTimeout as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# kNN graph sidecar written by build_map (papers.knn.npz), reloaded when it changes
+_knn_graph = {"mtime": None, "graph": None}
+
+def get_knn_graph():
+    """Load papers.knn.npz, cached until the file changes"""
+    from knn_graph import load_knn_graph
+
+    path = Path(__file__).parent / "papers.knn.npz"
+    mtime = path.stat().st_mtime if path.exists() else None
+    if mtime != _knn_graph["mtime"]:
+        _knn_graph["graph"] = load_knn_graph(str(path)) if mtime else None
+        _knn_graph["mtime"] = mtime
+    return _knn_graph["graph"]
+
+
+@app.route('/api/semantic-search/stats', methods=['GET'])
+def semantic_search_stats():
+    """Query embedding cache and batch encoder counters, ANN index state"""
+    with _chunk_index_lock:
+        index, building = _chunk_index["index"], _chunk_index["building"] is not None
+    ann = index.describe() if index is not None else {"backend": "exact"}
+    return jsonify({"query_cache": query_cache.stats(), "query_encoder": query_encoder.stats(),
+                    "ann_index": {**ann, "building": building}})
+
+
+@app.route('/api/papers/<int:paper_id>/similar', methods=['GET'])
+def similar_papers_endpoint(paper_id):
+    """Papers nearest to one paper, from the precomputed kNN graph (no model needed)
+
+    Query params:
+        top_k: number of results (default 10, at most the graph's neighbours)
+
+    Neighbours are by content only (cosine of the paper embeddings); venue,
+    item type and age do not affect them.
+    """
+    from knn_graph import N_NEIGHBORS, similar_papers
+
+    top_k = max(1, min(request.args.get('top_k', 10, type=int), N_NEIGHBORS - 1))
+
+    try:
+        graph = get_knn_graph()
+        if graph is None:
+            return jsonify({"error": "No kNN graph found. Run build_map.py first."}), 500
+
+        papers = paper_index.get().papers
+
+        if graph["keys"] != [p.get("zotero_key", "") for p in papers]:
+            return jsonify({"error": "kNN graph is out of date with papers.json. Rebuild the map."}), 409
+        if not 0 <= paper_id < len(papers):
+            return jsonify({"error": f"Paper {paper_id} not found"}), 404
+
+        results = []
+        for neighbor_id, similarity in similar_papers(graph, paper_id, top_k):
+            paper = papers[neighbor_id]
+            results.append({
+                "id": paper["id"],
+                "title": paper.get("title", ""),
+                "authors": paper.get("authors", ""),
+                "year": paper.get("year"),
+                "cluster": paper.get("cluster"),
+                "cluster_label": paper.get("cluster_label", ""),
+                "similarity": similarity
+            })
+
+        return jsonify({"paper_id": paper_id, "results": results})
+
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1249,20 +1348,12 @@ def external_search():
     limit = min(max(limit, 1), 100)  # Clamp to 1-100
 
     try:
-        # Load papers.json to get existing paper IDs
-        papers_path = Path(__file__).parent / "papers.json"
-        my_s2_ids = set()
-        my_dois = set()
-
-        if papers_path.exists():
-            with open(papers_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                papers = data.get('papers', data) if isinstance(data, dict) else data
-                for p in papers:
-                    if p.get('s2_id'):
-                        my_s2_ids.add(p['s2_id'])
-                    if p.get('doi'):
-                        my_dois.add(p['doi'].lower())
+        # Existing paper IDs from the shared paper index
+        try:
+            snapshot = paper_index.get()
+            my_s2_ids, my_dois = snapshot.by_s2, snapshot.by_doi
+        except FileNotFoundError:
+            my_s2_ids, my_dois = {}, {}
 
         # Call Semantic Scholar Search API
         S2_API_KEY = os.environ.get("S2_API_KEY")
@@ -1430,11 +1521,8 @@ def delete_outline(outline_id):
 
 def update_papers_json_tags(zotero_key: str, tags: list):
     """Update tags in papers.json for a specific paper"""
-    papers_path = Path(__file__).parent / "papers.json"
-
     try:
-        with open(papers_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = paper_index.load_mutable()
 
         papers = data.get('papers', data)
 
@@ -1448,8 +1536,7 @@ def update_papers_json_tags(zotero_key: str, tags: list):
         else:
             data = papers
 
-        with open(papers_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        write_papers_json(PAPERS_PATH, data)
 
     except Exception as e:
         print(f"Error updating papers.json: {e}")
@@ -1465,5 +1552,12 @@ if __name__ == '__main__':
 
     print(f"Starting API server on port {port}")
     print(f"API Key configured: {'Yes' if API_KEY else 'No'}")
+    try:
+        snapshot = paper_index.get()
+        print(f"Paper index: {len(snapshot.papers)} papers")
+        if snapshot.embeddings is not None:
+            get_chunk_index(snapshot)  # 첫 검색 전에 백그라운드로 ANN 인덱스 빌드 시작
+    except FileNotFoundError:
+        print("Paper index: papers.json not found yet")
 
     app.run(host='0.0.0.0', port=port, debug=debug)
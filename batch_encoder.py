@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Micro-batched query encoder for concurrent semantic searches
+- Request threads enqueue their query text and wait on a future
+- One background worker takes the first queued text, keeps collecting for up
+  to max_wait_ms (or until max_batch texts) and runs a single encode() call
+- Vectors are handed back to each waiting request in order; a failed batch (or
+  one that returns the wrong number of vectors) fails every request in it, and
+  the worker keeps running
+- Waiting requests give up after a timeout (EncoderTimeout -> 503 in api_server)
+- `python batch_encoder.py bench` compares per-thread encode vs micro-batched
+  throughput and p50/p99 latency under concurrent load
+"""
+
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import numpy as np
+
+DEFAULT_WAIT_MS = 5.0
+DEFAULT_MAX_BATCH = 32
+DEFAULT_TIMEOUT = 60.0  # 첫 배치는 모델 로드까지 포함
+
+
+class EncoderTimeout(RuntimeError):
+    """The encoder did not answer within the timeout"""
+
+
+class BatchEncoder:
+    """Collects encode(text) calls from many threads into batched encode_batch(texts)"""
+
+    def __init__(self, encode_batch, max_wait_ms: float = DEFAULT_WAIT_MS, max_batch: int = DEFAULT_MAX_BATCH,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.encode_batch = encode_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.texts = 0
+        self.largest_batch = 0
+        self.failed_batches = 0
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._start_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="query-encoder", daemon=True)
+                    self._worker.start()
+
+    def encode(self, text: str) -> np.ndarray:
+        """Embedding of one text; blocks until its batch has been encoded
+
+        Raises EncoderTimeout if that takes longer than self.timeout seconds.
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise EncoderTimeout(f"Query encoder did not answer within {self.timeout:.0f}s") from None
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                # 대기 시간이 지나도 이미 쌓인 요청은 함께 처리
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                vectors = [np.asarray(v) for v in self.encode_batch([text for text, _ in batch])]
+                if len(vectors) != len(batch):
+                    raise RuntimeError(f"Encoder returned {len(vectors)} vectors for {len(batch)} texts")
+            except BaseException as e:
+                # 워커가 죽으면 이후 요청이 모두 멈추므로 배치만 실패시키고 계속
+                self.failed_batches += 1
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def stats(self) -> dict:
+        return {
+            "max_wait_ms": self.max_wait * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch": self.texts / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "failed_batches": self.failed_batches,
+            "queued": self._queue.qsize(),
+        }
+
+
+def bench(model, queries: list, concurrency: int, max_wait_ms: float, max_batch: int) -> dict:
+    """Queries/s and latency percentiles: each thread calls encode vs one BatchEncoder"""
+    encoder = BatchEncoder(model.encode, max_wait_ms, max_batch)
+    results = {}
+    for name, encode in [("per-thread", lambda q: model.encode([q])[0]), ("micro-batched", encoder.encode)]:
+        def timed(q):
+            start = time.perf_counter()
+            encode(q)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            latencies = list(pool.map(timed, queries))
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "qps": len(queries) / elapsed,
+            "p50_ms": float(np.percentile(latencies, 50) * 1000),
+            "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        }
+    results["micro-batched"]["mean_batch"] = encoder.stats()["mean_batch"]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batched query encoder benchmark")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--wait-ms", type=float, default=DEFAULT_WAIT_MS)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--backend", default="torch", help="Embedding backend (see embedding_backend.py)")
+    args = parser.parse_args()
+
+    from embedding_backend import load_sentence_model, DEFAULT_MODEL
+
+    model = load_sentence_model(DEFAULT_MODEL, args.backend)
+    words = ["interaction", "visualization", "agents", "learning", "survey", "design", "user study",
+             "사용자 경험", "언어 모델", "협업", "accessibility", "explainable"]
+    rng = np.random.default_rng(42)
+    queries = [" ".join(rng.choice(words, size=3)) for _ in range(args.requests)]
+    model.encode(queries[:8])  # 워밍업
+
+    print(f"{'concurrency':>11} {'mode':>14} {'q/s':>8} {'p50':>9} {'p99':>9}")
+    for concurrency in args.concurrency:
+        for name, r in bench(model, queries, concurrency, args.wait_ms, args.max_batch).items():
+            extra = f"  (mean batch {r['mean_batch']:.1f})" if "mean_batch" in r else ""
+            print(f"{concurrency:>11} {name:>14} {r['qps']:>8.1f} {r['p50_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms{extra}")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for build_map / api_server stages on synthetic libraries
+- metadata: row-wise apply/iterrows vs vectorized process_metadata
+- hybrid: per-paper compute_hybrid_score loop vs vectorized hybrid_search
+"""
+
+import re
+import time
+import random
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import build_map
+import hybrid_search
+
+ITEM_TYPES = ["journalArticle", "conferencePaper", "preprint", "book", "bookSection",
+              "thesis", "webpage", "computerProgram", "report", None]
+VENUES = ["Proceedings of the CHI Conference on Human Factors in Computing Systems",
+          "ACM Transactions on Computer-Human Interaction", "Nature", "arXiv",
+          "IEEE Transactions on Visualization and Computer Graphics", "Journal of Something Obscure",
+          "International Conference on Machine Learning", "", None]
+TITLE_WORDS = ["learning", "interaction", "design", "study", "users", "model", "survey of",
+               "a review", "systematic review", "visualization", "agents", "meta-analysis"]
+
+
+def synthetic_library(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Zotero-like DataFrame with the columns the metadata stage reads"""
+    rng = random.Random(seed)
+    years = [str(rng.randint(1950, 2026)) for _ in range(rows)]
+    for i in rng.sample(range(rows), rows // 10):
+        years[i] = rng.choice(["", "n.d.", "2019.0", None])
+    return pd.DataFrame({
+        "Key": [f"K{i:07d}" for i in range(rows)],
+        "Title": [" ".join(rng.choices(TITLE_WORDS, k=6)).capitalize() for _ in range(rows)],
+        "Publication Year": years,
+        "Item Type": [rng.choice(ITEM_TYPES) for _ in range(rows)],
+        "Publication Title": [rng.choice(VENUES) for _ in range(rows)],
+        "Proceedings Title": [rng.choice(VENUES) for _ in range(rows)],
+        "Conference Name": [rng.choice(VENUES) for _ in range(rows)],
+        "Series": [rng.choice(VENUES) for _ in range(rows)],
+        "Abstract Note": ["Lorem ipsum dolor sit amet " * rng.randint(1, 20) for _ in range(rows)],
+    })
+
+
+# 이전 구현 그대로 (정규식 결합/캐시 이전): 현재 build_map 함수를 쓰면 전후 비교가 안 됨
+def baseline_venue_score(row) -> float:
+    text_to_check = " ".join([
+        str(row.get("Publication Title", "")),
+        str(row.get("Proceedings Title", "")),
+        str(row.get("Conference Name", "")),
+        str(row.get("Series", "")),
+    ]).lower()
+    for keyword in build_map.VENUE_TIER3:
+        if keyword in text_to_check:
+            return 3.0
+    for keyword in build_map.VENUE_TIER1:
+        if keyword in text_to_check:
+            return 5.0
+    for keyword in build_map.VENUE_TIER2:
+        if keyword in text_to_check:
+            return 4.0
+    if "human factors in computing systems" in text_to_check or "sigchi" in text_to_check:
+        return 5.0
+    return 2.5
+
+
+BASELINE_REVIEW_PATTERNS = [
+    r'\ba\s+review\b', r'\breview\s+of\b', r'\bliterature\s+review\b', r'\bsystematic\s+review\b',
+    r'\bscoping\s+review\b', r'\bmeta[\-\s]?analysis\b', r'\bsurvey\s+of\b', r'\ba\s+survey\b',
+    r'\bstate[\-\s]of[\-\s]the[\-\s]art\b', r':\s*a\s+review\b', r':\s*review\s+and\b',
+]
+
+
+def baseline_is_review_paper(title: str, abstract: str) -> bool:
+    if not title:
+        return False
+    title_lower = title.lower()
+    for pattern in BASELINE_REVIEW_PATTERNS:
+        if re.search(pattern, title_lower):
+            return True
+    return False
+
+
+def rowwise_metadata(df: pd.DataFrame) -> pd.DataFrame:
+    """Previous implementation: per-row apply + iterrows review detection"""
+    df["year_clean"] = df["Publication Year"].apply(build_map.parse_year)
+    df["age"] = df["year_clean"].apply(lambda y: build_map.CURRENT_YEAR - y if y else None)
+    df["age"] = df["age"].fillna(df["age"].median())
+    df["venue_quality"] = df.apply(baseline_venue_score, axis=1)
+    df["type_score"] = df["Item Type"].apply(build_map.get_type_score)
+    df["is_paper"] = df["Item Type"].isin(["conferencePaper", "journalArticle", "bookSection", "preprint", "book"])
+    df["is_review"] = [baseline_is_review_paper(str(row.get("Title", "") or ""), "") for _, row in df.iterrows()]
+    return df
+
+
+def bench_metadata(rows: int, repeat: int):
+    base = synthetic_library(rows)
+    results = {}
+    for name, fn in [("row-wise", rowwise_metadata), ("vectorized", build_map.process_metadata)]:
+        times = []
+        for _ in range(repeat):
+            build_map.venue_tier_score.cache_clear()
+            df = base.copy()
+            start = time.perf_counter()
+            results[name] = fn(df)
+            times.append(time.perf_counter() - start)
+        print(f"{name:>10}: {min(times) * 1000:8.1f} ms  ({rows / min(times):,.0f} rows/s)")
+
+    old, new = results["row-wise"], results["vectorized"]
+    for col in ["year_clean", "age", "venue_quality", "type_score", "is_paper", "is_review"]:
+        same = np.array_equal(old[col].astype(float).fillna(-1).values, new[col].astype(float).fillna(-1).values)
+        if not same:
+            print(f"⚠️  column {col} differs between implementations")
+
+
+def loop_hybrid_search(papers: list, query: np.ndarray, top_k: int,
+                       alpha: float = hybrid_search.ALPHA, top_k_mean: int = hybrid_search.TOP_K_MEAN):
+    """Previous implementation: compute_hybrid_score per paper + full argsort"""
+    scores = []
+    for vecs in papers:
+        emb_array = np.asarray(vecs, dtype=np.float32)
+        sims = (emb_array / np.linalg.norm(emb_array, axis=1, keepdims=True)) @ query
+        top = np.sort(sims)[::-1][:top_k_mean]
+        scores.append(alpha * np.max(sims) + (1 - alpha) * np.mean(top))
+    scores = np.array(scores)
+    return np.argsort(scores)[::-1][:top_k], scores
+
+
+def bench_hybrid(papers: int, chunks: int, dim: int, queries: int, top_k: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    # 논문마다 1개 이상, 평균 chunks/papers개의 청크
+    counts = 1 + rng.multinomial(chunks - papers, np.full(papers, 1 / papers))
+    offsets = np.zeros(papers + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    matrix = rng.standard_normal((chunks, dim)).astype(np.float32)
+    per_paper = [matrix[offsets[i]:offsets[i + 1]] for i in range(papers)]
+    query_set = hybrid_search.normalize_rows(rng.standard_normal((queries, dim)))
+
+    start = time.perf_counter()
+    unit = hybrid_search.normalize_rows(matrix)
+    print(f"{papers:,} papers / {chunks:,} chunks / dim {dim}; normalise once: "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    loop_times, vec_times, max_diff, mismatched = [], [], 0.0, 0
+    for q in query_set:
+        start = time.perf_counter()
+        old_top, old_scores = loop_hybrid_search(per_paper, q, top_k)
+        loop_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        scores = hybrid_search.hybrid_scores(unit, offsets, q)
+        new_top = hybrid_search.top_k_papers(scores, top_k)
+        vec_times.append(time.perf_counter() - start)
+
+        max_diff = max(max_diff, float(np.abs(scores - old_scores).max()))
+        mismatched += len(set(old_top.tolist()) ^ set(new_top.tolist())) // 2
+
+    for name, times in [("loop", loop_times), ("vectorized", vec_times)]:
+        print(f"{name:>10}: {np.median(times) * 1000:8.1f} ms/query (median of {len(times)})")
+    print(f"speedup: {np.median(loop_times) / np.median(vec_times):.0f}x, "
+          f"max |score diff| {max_diff:.2e}, top-{top_k} mismatches {mismatched}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="build_map micro-benchmarks")
+    parser.add_argument("command", choices=["metadata", "hybrid"])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--papers", type=int, default=10_000, help="hybrid: number of papers")
+    parser.add_argument("--chunks", type=int, default=100_000, help="hybrid: total chunk vectors")
+    parser.add_argument("--dim", type=int, default=384, help="hybrid: embedding dimension")
+    parser.add_argument("--queries", type=int, default=20, help="hybrid: queries to time")
+    parser.add_argument("--top-k", type=int, default=20, help="hybrid: results per query")
+    args = parser.parse_args()
+
+    if args.command == "metadata":
+        bench_metadata(args.rows, args.repeat)
+    elif args.command == "hybrid":
+        bench_hybrid(args.papers, args.chunks, args.dim, args.queries, args.top_k)
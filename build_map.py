@@ -21,14 +21,27 @@ import argparse
 import glob
 from datetime import datetime
 from pathlib import Path
-from bs4 import BeautifulSoup
-from sklearn.preprocessing import StandardScaler
+from functools import lru_cache
+from html.parser import HTMLParser
+from sklearn.preprocessing import StandardScaler, normalize
 from sklearn.manifold import TSNE
 from sklearn.decomposition import PCA
 import umap
 from sklearn.cluster import KMeans, DBSCAN
-from sklearn.metrics import silhouette_score
-from sklearn.feature_extraction.text import TfidfVectorizer
+from cluster_search import find_best_k
+from ctfidf_labels import cluster_term_counts, ctfidf_labels, group_counts
+from cluster_alignment import load_previous_clusters, align_clusters
+from cluster_hierarchy import build_hierarchy, leaf_to_node
+from knn_graph import N_NEIGHBORS, UMAP_SMALL_DATA, build_knn_graph, save_knn_graph, knn_path
+from map_model import new_build_id, save_map_model, load_map_model, previous_positions, map_drift
+from embedding_cache import EmbeddingCache, cached_encode
+from embedding_pool import EmbeddingPool
+from embedding_backend import BACKENDS, cache_key, load_sentence_model
+from openai_embeddings import OpenAIEmbeddingClient
+from embedding_codec import FORMATS, encode_vectors, decode_vectors
+from papers_io import write_papers_json
+from embedding_store import (DTYPES as SIDECAR_DTYPES, new_sidecar_id, write_sidecar, remove_stale_sidecars,
+                             load_sidecar, paper_rows)
 
 # ============================================================
 # 설정
@@ -274,6 +287,38 @@ ACM_VENUE_ABBREV = {
     "ieee.*haptics": "IEEE Haptics",
 }
 
+def _priority_regex(patterns: list) -> re.Pattern:
+    """패턴 목록을 우선순위 순서 그대로 한 번에 검사하는 정규식
+
+    문자열 시작에서 각 패턴을 lookahead로 순서대로 시도하므로, 문자열 안의 위치와 관계없이
+    목록에서 먼저 나온 패턴이 이긴다 (re.search를 순서대로 돌린 것과 같은 결과).
+    패턴마다 이름 그룹 p{i}로 감싸므로 패턴 안에 캡처 그룹이 있어도 번호가 밀리지 않음
+    (매칭된 패턴 번호 = _pattern_index(match))
+    """
+    return re.compile("^(?:" + "|".join(rf"(?=[\s\S]*?(?P<p{i}>{p}))" for i, p in enumerate(patterns)) + ")")
+
+
+def _pattern_index(match: re.Match) -> int:
+    """_priority_regex 매치에서 이긴 패턴의 목록 내 위치"""
+    # 바깥 이름 그룹이 안쪽 그룹보다 늦게 닫히므로 lastgroup은 항상 p{i}
+    return int(match.lastgroup[1:])
+
+
+_VENUE_ABBREV_RE = _priority_regex(list(ACM_VENUE_ABBREV))
+_VENUE_ABBREVS = list(ACM_VENUE_ABBREV.values())
+
+# venue 점수: 3티어 -> 1티어 -> 2티어 -> CHI 정식 명칭 순서
+_VENUE_TIER_KEYWORDS = (
+    [(k, 3.0) for k in VENUE_TIER3]
+    + [(k, 5.0) for k in VENUE_TIER1]
+    + [(k, 4.0) for k in VENUE_TIER2]
+    # CHI는 EA가 아니면 1티어 (위에서 EA 이미 걸러짐)
+    + [("human factors in computing systems", 5.0), ("sigchi", 5.0)]
+)
+_VENUE_TIER_RE = _priority_regex([re.escape(k) for k, _ in _VENUE_TIER_KEYWORDS])
+
+
+@lru_cache(maxsize=None)
 def get_venue_abbrev(venue: str) -> str:
     """긴 venue 이름을 약자로 변환"""
     if not venue:
@@ -285,10 +330,11 @@ def get_venue_abbrev(venue: str) -> str:
     year_match = re.search(r'\b(19|20)\d{2}\b', venue)
     year = year_match.group(0) if year_match else ""
 
-    # 패턴 매칭
-    for pattern, abbrev in ACM_VENUE_ABBREV.items():
-        if re.search(pattern, venue_lower):
-            return f"{abbrev} {year}".strip() if year else abbrev
+    # 패턴 매칭 (ACM_VENUE_ABBREV 순서대로 우선)
+    match = _VENUE_ABBREV_RE.match(venue_lower)
+    if match:
+        abbrev = _VENUE_ABBREVS[_pattern_index(match)]
+        return f"{abbrev} {year}".strip() if year else abbrev
 
     # 매칭 안 되면 원본 (너무 길면 자름)
     if len(venue) > 50:
@@ -315,59 +361,121 @@ CURRENT_YEAR = 2025
 # 유틸리티 함수
 # ============================================================
 
-def extract_text_from_html(html_content: str) -> str:
-    """HTML에서 텍스트만 추출 (문단 구분 보존)"""
-    import re
-    if pd.isna(html_content) or not html_content:
-        return ""
-
-    # 블록 요소 뒤에만 줄바꿈 추가 (인라인 요소는 유지)
-    html = str(html_content)
-
-    # 테이블 셀 내부의 <p> 태그 제거 (셀끼리 탭으로 구분)
-    html = re.sub(r'<t[dh][^>]*>\s*<p>', '<td>', html, flags=re.IGNORECASE)
-    html = re.sub(r'</p>\s*</t[dh]>', '</td>', html, flags=re.IGNORECASE)
-    # 테이블 행은 줄바꿈, 셀은 탭으로 구분
-    html = re.sub(r'</t[dh]>\s*<t[dh][^>]*>', '\t', html, flags=re.IGNORECASE)
-    html = re.sub(r'</tr>', '</tr>{LINE}', html, flags=re.IGNORECASE)
-    # 테이블 전체는 하나의 문단으로
-    html = re.sub(r'<table[^>]*>', '', html, flags=re.IGNORECASE)
-    html = re.sub(r'</table>', '{PARA}', html, flags=re.IGNORECASE)
-
-    # 블록 요소 닫는 태그 뒤에 마커 추가
-    # </p> 뒤에 <ul>, <ol>이 오면 붙이기 (같은 섹션)
-    html = re.sub(r'</p>\s*<(ul|ol)', r'</p>{LINE}<\1', html, flags=re.IGNORECASE)
-
-    # 일반 </p>, </div> 등은 문단 분리
-    block_para_tags = ['p', 'div', 'tr', 'blockquote']
-    for tag in block_para_tags:
-        # 이미 {LINE}이 붙은 경우 제외
-        html = re.sub(f'</{tag}>(?!{{)', f'</{tag}>{{PARA}}', html, flags=re.IGNORECASE)
+class _NoteTextParser(HTMLParser):
+    """HTML 노트 -> 텍스트 단일 패스 변환기
 
-    # 헤더는 다음 내용과 연결 (단일 줄바꿈)
-    for i in range(1, 7):
-        html = re.sub(f'</h{i}>', f'</h{i}>{{LINE}}', html, flags=re.IGNORECASE)
-
-    # 리스트 항목은 단일 줄바꿈 (문단 분리 아님)
-    html = re.sub(r'</li>', '</li>{LINE}', html, flags=re.IGNORECASE)
-
-    # <br>은 단일 줄바꿈, <hr>은 문단 분리 (섹션 구분)
-    html = re.sub(r'<br\s*/?>', '{LINE}', html, flags=re.IGNORECASE)
-    html = re.sub(r'<hr\s*/?>', '{PARA}', html, flags=re.IGNORECASE)
+    - </p>, </div>, </blockquote>, <hr>, </table>: 문단 분리 (빈 줄)
+    - </h1-6>, </li>, <br>, </tr>: 줄바꿈 (연속 두 번이면 문단 분리)
+    - </p> 바로 뒤에 <ul>/<ol>이 오면 같은 섹션으로 보고 줄바꿈만
+    - 테이블: 셀은 탭, 행은 줄바꿈, 셀 안의 문단은 공백으로 이어 붙임
+    """
 
-    soup = BeautifulSoup(html, "html.parser")
-    text = soup.get_text(separator=" ", strip=True)
+    PARA_TAGS = {"p", "div", "blockquote"}
+    LINE_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6", "li"}
+    SKIP_TAGS = {"script", "style"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.pending_newlines = 0   # 다음 텍스트 앞에 넣을 줄바꿈 수 (최대 2)
+        self.pending_tab = False
+        self.pending_space = False
+        self.after_p_close = False  # </p> 직후 (<ul>/<ol>이면 줄바꿈으로 완화)
+        self.cell_depth = 0
+        self.row_has_cell = False
+        self.skip_depth = 0
+
+    def _break(self, n):
+        if self.cell_depth:
+            self.pending_space = True
+        else:
+            self.pending_newlines = min(2, self.pending_newlines + n)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("ul", "ol") and self.after_p_close:
+            self.pending_newlines = min(self.pending_newlines, 1)
+        self.after_p_close = False
+
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag == "br":
+            self._break(1)
+        elif tag == "hr":
+            self._break(2)
+        elif tag in ("td", "th"):
+            if self.row_has_cell:
+                self.pending_tab = True
+            self.row_has_cell = True
+            self.cell_depth += 1
+        elif tag == "tr":
+            self.row_has_cell = False
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self.after_p_close = False
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in ("td", "th"):
+            self.cell_depth = max(0, self.cell_depth - 1)
+        elif tag == "tr":
+            self.pending_tab = False
+            self._break(1)
+        elif tag == "table":
+            self._break(2)
+        elif tag in self.PARA_TAGS:
+            self._break(2)
+            self.after_p_close = tag == "p"
+        elif tag in self.LINE_TAGS:
+            self._break(1)
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        text = re.sub(r"\s+", " ", data)
+        if not text.strip():
+            if text:
+                self.pending_space = True
+            return
+        self.after_p_close = False
+
+        if self.parts:
+            if self.pending_newlines:
+                self.parts.append("\n" * self.pending_newlines)
+            elif self.pending_tab:
+                self.parts.append("\t")
+            elif self.pending_space or text[0] == " ":
+                self.parts.append(" ")
+        self.pending_newlines = 0
+        self.pending_tab = False
+        self.pending_space = text[-1] == " "
+        self.parts.append(text.strip())
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+# 노트 추출 결과(청크 텍스트)가 바뀌면 올림: 이전 빌드의 벡터를 --incremental로 재사용하지 않도록
+NOTE_EXTRACTOR_VERSION = 2  # 2: html.parser 단일 패스 (인라인 요소 공백 변경)
+
+
+@lru_cache(maxsize=None)
+def _html_to_text(html: str) -> str:
+    parser = _NoteTextParser()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
 
-    # 마커를 실제 줄바꿈으로 변환
-    text = text.replace('{PARA}', '\n\n')
-    text = text.replace('{LINE}', '\n')
 
-    # 연속된 줄바꿈/공백 정리
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r' +', ' ', text)
-    text = re.sub(r'\n +', '\n', text)
+def extract_text_from_html(html_content: str) -> str:
+    """HTML에서 텍스트만 추출 (문단 구분 보존)
 
-    return text.strip()
+    같은 노트는 빌드 중 여러 번(임베딩, 클러스터 라벨, 레코드) 호출되므로 결과를 메모이즈한다.
+    """
+    if pd.isna(html_content) or not html_content:
+        return ""
+    return _html_to_text(str(html_content))
 
 
 def get_venue_score(row) -> float:
@@ -379,27 +487,15 @@ def get_venue_score(row) -> float:
         str(row.get("Conference Name", "")),
         str(row.get("Series", "")),
     ]).lower()
+    return venue_tier_score(text_to_check)
 
-    # 3티어 먼저 체크 (CHI EA, workshop 등)
-    for keyword in VENUE_TIER3:
-        if keyword in text_to_check:
-            return 3.0
-
-    # 1티어 체크
-    for keyword in VENUE_TIER1:
-        if keyword in text_to_check:
-            return 5.0
-
-    # 2티어 체크
-    for keyword in VENUE_TIER2:
-        if keyword in text_to_check:
-            return 4.0
-
-    # CHI는 EA가 아니면 1티어 (위에서 EA 이미 걸러짐)
-    # "human factors in computing systems" 또는 "sigchi"로 정확히 매칭
-    if "human factors in computing systems" in text_to_check or "sigchi" in text_to_check:
-        return 5.0
 
+@lru_cache(maxsize=None)
+def venue_tier_score(text: str) -> float:
+    """소문자 venue 텍스트 -> 점수 (3티어 먼저, 그다음 1티어, 2티어)"""
+    match = _VENUE_TIER_RE.match(text)
+    if match:
+        return _VENUE_TIER_KEYWORDS[_pattern_index(match)][1]
     return 2.5  # 기본값
 
 
@@ -421,6 +517,23 @@ def parse_year(year_val) -> int:
     return None
 
 
+# 제목에서 명확한 리뷰 패턴 (높은 신뢰도) - 하나의 정규식으로 결합
+REVIEW_TITLE_PATTERNS = [
+    r'\ba\s+review\b',              # "a review"
+    r'\breview\s+of\b',             # "review of"
+    r'\bliterature\s+review\b',     # "literature review"
+    r'\bsystematic\s+review\b',     # "systematic review"
+    r'\bscoping\s+review\b',        # "scoping review"
+    r'\bmeta[\-\s]?analysis\b',     # "meta-analysis"
+    r'\bsurvey\s+of\b',             # "survey of"
+    r'\ba\s+survey\b',              # "a survey"
+    r'\bstate[\-\s]of[\-\s]the[\-\s]art\b',  # "state-of-the-art"
+    r':\s*a\s+review\b',            # ": a review" (부제)
+    r':\s*review\s+and\b',          # ": review and..." (부제)
+]
+REVIEW_TITLE_RE = re.compile("|".join(f"(?:{p})" for p in REVIEW_TITLE_PATTERNS))
+
+
 def is_review_paper(title: str, abstract: str) -> bool:
     """리뷰/서베이 논문인지 자동 감지
 
@@ -429,29 +542,49 @@ def is_review_paper(title: str, abstract: str) -> bool:
     """
     if not title:
         return False
+    return bool(REVIEW_TITLE_RE.search(title.lower()))
 
-    title_lower = title.lower()
-
-    # 제목에서 명확한 리뷰 패턴 (높은 신뢰도)
-    title_patterns = [
-        r'\ba\s+review\b',              # "a review"
-        r'\breview\s+of\b',             # "review of"
-        r'\bliterature\s+review\b',     # "literature review"
-        r'\bsystematic\s+review\b',     # "systematic review"
-        r'\bscoping\s+review\b',        # "scoping review"
-        r'\bmeta[\-\s]?analysis\b',     # "meta-analysis"
-        r'\bsurvey\s+of\b',             # "survey of"
-        r'\ba\s+survey\b',              # "a survey"
-        r'\bstate[\-\s]of[\-\s]the[\-\s]art\b',  # "state-of-the-art"
-        r':\s*a\s+review\b',            # ": a review" (부제)
-        r':\s*review\s+and\b',          # ": review and..." (부제)
-    ]
 
-    for pattern in title_patterns:
-        if re.search(pattern, title_lower):
-            return True
+def text_column(df: pd.DataFrame, col: str) -> pd.Series:
+    """컬럼을 문자열 Series로 (컬럼이 없거나 NaN이면 "")"""
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[col].fillna("").astype(str)
 
-    return False
+
+def record_column(df: pd.DataFrame, col: str) -> pd.Series:
+    """papers.json 레코드용 원본 값 Series (컬럼이 없으면 "", NaN은 그대로)"""
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[col]
+
+
+def record_text(df: pd.DataFrame, col: str) -> list:
+    """레코드 문자열 필드: 행 단위 출력과 같은 str(value or "") (NaN은 "nan")"""
+    return [str(v or "") for v in record_column(df, col)]
+
+
+def process_metadata(df: pd.DataFrame) -> pd.DataFrame:
+    """연도/나이, venue 점수, type 점수, 논문/리뷰 여부를 컬럼 단위로 계산"""
+    # 연도: parse_year와 같은 규칙 (숫자 -> 버림 -> 1900 < year <= CURRENT_YEAR)
+    year_str = df["Publication Year"].astype(str).str.extract(r"^\s*(\d+(?:\.\d*)?)\s*$", expand=False)
+    years = np.floor(pd.to_numeric(year_str, errors="coerce"))
+    df["year_clean"] = years.where((years > 1900) & (years <= CURRENT_YEAR))
+    df["age"] = CURRENT_YEAR - df["year_clean"]
+    df["age"] = df["age"].fillna(df["age"].median())
+
+    # venue 점수: 고유 venue 문자열마다 한 번만 계산 (venue_tier_score 캐시)
+    venue_text = (
+        text_column(df, "Publication Title") + " " + text_column(df, "Proceedings Title") + " "
+        + text_column(df, "Conference Name") + " " + text_column(df, "Series")
+    ).str.lower()
+    df["venue_quality"] = venue_text.map(venue_tier_score)
+    df["type_score"] = df["Item Type"].map(TYPE_SCORE).fillna(2)
+
+    # is_paper 플래그 (논문 vs 앱/서비스)
+    df["is_paper"] = df["Item Type"].isin(["conferencePaper", "journalArticle", "bookSection", "preprint", "book"])
+    df["is_review"] = text_column(df, "Title").str.lower().str.contains(REVIEW_TITLE_RE)
+    return df
 
 
 def build_text_for_embedding(row) -> str:
@@ -487,16 +620,133 @@ def build_text_for_embedding(row) -> str:
 # 임베딩 함수
 # ============================================================
 
-def embed_with_sentence_transformers(texts: list, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2") -> np.ndarray:
-    """sentence-transformers로 임베딩"""
-    from sentence_transformers import SentenceTransformer
+# 라이브러리 전체 배치 인코딩 설정 (main()에서 CLI 옵션으로 덮어씀)
+EMBED_SETTINGS = {
+    "batch_size": 64,  # encode 1회(forward pass)당 텍스트 수
+    "cache": None,     # EmbeddingCache (None이면 캐시 사용 안 함)
+    "workers": 1,      # >1이면 프로세스 풀로 분산 인코딩
+    "threads": 0,      # 워커당 intra-op 스레드 수 (0 = 코어 수 / 워커 수)
+    "backend": "torch",  # torch | onnx-int8
+    "model_dir": None,   # onnx-int8 모델 디렉토리 (None = models/<model>-onnx)
+}
+
+# OpenAI 임베딩 클라이언트 설정 (main()에서 CLI 옵션으로 덮어씀)
+OPENAI_SETTINGS = {
+    "model": "text-embedding-3-small",
+    "dimensions": None,    # 저장 벡터 차원 축소 (text-embedding-3-*)
+    "concurrency": 4,      # 동시 요청 수
+    "rpm": 3000,           # requests per minute
+    "tpm": 1_000_000,      # tokens per minute
+    "checkpoint": ".openai_embeddings.progress.jsonl",  # 중단 후 이어서 진행용
+}
+
+# 중복 제거 통계 (빌드 전체 누적)
+EMBED_STATS = {"chunks": 0, "unique": 0}
+
+_st_models = {}
+_embedding_pools = {}
+
+
+def get_st_model(model_name: str):
+    """SentenceTransformer 모델 로드 (빌드 중 재사용)"""
+    if model_name not in _st_models:
+        print(f"Loading model: {model_name} [{EMBED_SETTINGS['backend']}]")
+        _st_models[model_name] = load_sentence_model(
+            model_name, EMBED_SETTINGS["backend"], EMBED_SETTINGS["model_dir"]
+        )
+    return _st_models[model_name]
+
+
+def get_embedding_pool(model_name: str) -> EmbeddingPool:
+    """모델별 워커 프로세스 풀 (빌드 중 재사용)"""
+    if model_name not in _embedding_pools:
+        _embedding_pools[model_name] = EmbeddingPool(
+            model_name, EMBED_SETTINGS["workers"], EMBED_SETTINGS["threads"],
+            EMBED_SETTINGS["backend"], EMBED_SETTINGS["model_dir"]
+        )
+    return _embedding_pools[model_name]
+
+
+def shutdown_embedding_pools():
+    for pool in _embedding_pools.values():
+        pool.close()
+    _embedding_pools.clear()
+
+
+def encode_unique(texts: list, encode_fn, verbose: bool = True) -> np.ndarray:
+    """같은 텍스트는 한 번만 인코딩하고 결과를 원래 위치로 펼침
+
+    논문 간 공유되는 노트 템플릿, preprint/출판본 중복 초록 등을 건너뛴다.
+    """
+    index = {}
+    unique = []
+    inverse = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        j = index.get(text)
+        if j is None:
+            j = index[text] = len(unique)
+            unique.append(text)
+        inverse[i] = j
+
+    EMBED_STATS["chunks"] += len(texts)
+    EMBED_STATS["unique"] += len(unique)
+    saved = len(texts) - len(unique)
+    if verbose and saved:
+        print(f"  Dedup: {len(texts)} chunks -> {len(unique)} unique ({saved} encodes saved)")
+
+    return np.asarray(encode_fn(unique))[inverse]
 
-    print(f"Loading model: {model_name}")
-    model = SentenceTransformer(model_name)
 
+def encode_texts(texts: list, model_name: str, show_progress: bool = True) -> np.ndarray:
+    """텍스트 목록 임베딩 (중복 제거 -> 캐시 조회 -> 없는 것만 인코딩)
+
+    반환값: (len(texts), dim) 행렬, 입력 순서 그대로
+    """
+    return encode_unique(texts, lambda unique: cached_encode(
+        EMBED_SETTINGS["cache"], cache_key(model_name, EMBED_SETTINGS["backend"]), unique,
+        lambda missing: _encode_batches(missing, model_name, show_progress),
+        verbose=show_progress
+    ), verbose=show_progress)
+
+
+def _encode_batches(texts: list, model_name: str, show_progress: bool = True) -> np.ndarray:
+    """텍스트 전체를 길이순 버킷으로 묶어 배치 인코딩 (결과는 입력 순서 그대로)
+
+    비슷한 길이끼리 한 배치에 넣어 패딩 낭비를 줄인다.
+    워커 설정이 있고 텍스트가 충분히 많으면 프로세스 풀로 분산한다.
+    """
+    total = len(texts)
+    batch_size = max(1, EMBED_SETTINGS["batch_size"])
+    workers = EMBED_SETTINGS["workers"]
+    if workers > 1 and total >= workers * batch_size:
+        return get_embedding_pool(model_name).encode(texts, batch_size, show_progress)
+
+    model = get_st_model(model_name)
+    if total == 0:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+    order = sorted(range(total), key=lambda i: len(texts[i]), reverse=True)
+    vectors = None
+
+    for start in range(0, total, batch_size):
+        idx = order[start:start + batch_size]
+        batch_embs = model.encode([texts[i] for i in idx], batch_size=len(idx),
+                                  convert_to_numpy=True, show_progress_bar=False)
+        if vectors is None:
+            vectors = np.empty((total, batch_embs.shape[1]), dtype=batch_embs.dtype)
+        vectors[idx] = batch_embs
+
+        done = min(start + batch_size, total)
+        if show_progress and ((start // batch_size) % 20 == 0 or done == total):
+            print(f"  Processed {done}/{total} chunks")
+
+    return vectors
+
+
+def embed_with_sentence_transformers(texts: list, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2") -> np.ndarray:
+    """sentence-transformers로 임베딩"""
     print(f"Embedding {len(texts)} texts...")
-    embeddings = model.encode(texts, show_progress_bar=True)
-    return np.array(embeddings)
+    return encode_texts(texts, model_name)
 
 
 def chunk_text(text: str, max_chars: int = 1500) -> list:
@@ -531,42 +781,35 @@ def chunk_text(text: str, max_chars: int = 1500) -> list:
 
 def embed_with_weighted_sections(df: pd.DataFrame, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2",
                                   title_weight: float = 0.3, abstract_weight: float = 0.4, notes_weight: float = 0.3) -> np.ndarray:
-    """섹션별 가중치 + 청킹으로 임베딩 (단일 벡터 버전 - legacy)"""
-    from sentence_transformers import SentenceTransformer
-
-    print(f"Loading model: {model_name}")
-    model = SentenceTransformer(model_name)
+    """섹션별 가중치 + 청킹으로 임베딩 (단일 벡터 버전 - legacy)
 
-    embeddings = []
+    모든 논문의 섹션 텍스트를 한 번에 인코딩한 뒤,
+    섹션별 청크 평균과 논문별 가중 평균을 행렬 단위(np.add.reduceat)로 계산한다.
+    """
     total = len(df)
 
     print(f"Embedding {total} papers with weighted sections...")
     print(f"  Weights: title={title_weight}, abstract={abstract_weight}, notes={notes_weight}")
 
-    for idx, (_, row) in enumerate(df.iterrows()):
-        if (idx + 1) % 50 == 0 or idx == 0:
-            print(f"  Processed {idx + 1}/{total}")
+    flat_texts = []
+    seg_starts = []    # 섹션(세그먼트)별 첫 텍스트 위치
+    seg_weights = []   # 섹션별 가중치
+    paper_starts = []  # 논문별 첫 세그먼트 번호
 
-        section_embs = []
-        section_weights = []
+    for _, row in df.iterrows():
+        sections = []
 
         # Title
         title = row.get("Title", "")
         if pd.notna(title) and title and str(title).lower() != "nan":
-            title_emb = model.encode(str(title))
-            section_embs.append(title_emb)
-            section_weights.append(title_weight)
+            sections.append(([str(title)], title_weight))
 
         # Abstract
         abstract = row.get("Abstract Note", "")
         if pd.notna(abstract) and abstract and str(abstract).lower() != "nan":
-            abstract_str = str(abstract)
-            chunks = chunk_text(abstract_str)
+            chunks = chunk_text(str(abstract))
             if chunks:
-                chunk_embs = model.encode(chunks)
-                abstract_emb = np.mean(chunk_embs, axis=0) if len(chunks) > 1 else chunk_embs[0]
-                section_embs.append(abstract_emb)
-                section_weights.append(abstract_weight)
+                sections.append((chunks, abstract_weight))
 
         # Notes
         notes = row.get("Notes", "")
@@ -575,106 +818,113 @@ def embed_with_weighted_sections(df: pd.DataFrame, model_name: str = "paraphrase
             if notes_text:
                 chunks = chunk_text(notes_text)
                 if chunks:
-                    chunk_embs = model.encode(chunks)
-                    notes_emb = np.mean(chunk_embs, axis=0) if len(chunks) > 1 else chunk_embs[0]
-                    section_embs.append(notes_emb)
-                    section_weights.append(notes_weight)
-
-        # 가중 평균
-        if section_embs:
-            weights = np.array(section_weights)
-            weights = weights / weights.sum()  # 정규화
-            final_emb = np.average(section_embs, axis=0, weights=weights)
-        else:
-            # fallback: 제목만이라도
+                    sections.append((chunks, notes_weight))
+
+        # fallback: 제목만이라도 (단독 섹션이므로 가중 평균 = 자기 자신)
+        if not sections:
             fallback_title = row.get("Title", "Untitled")
-            final_emb = model.encode(str(fallback_title) if pd.notna(fallback_title) else "Untitled")
+            sections.append(([str(fallback_title) if pd.notna(fallback_title) else "Untitled"], 1.0))
 
-        embeddings.append(final_emb)
+        paper_starts.append(len(seg_weights))
+        for texts, weight in sections:
+            seg_starts.append(len(flat_texts))
+            seg_weights.append(weight)
+            flat_texts.extend(texts)
 
-    print(f"  Processed {total}/{total}")
-    return np.array(embeddings)
+    if total == 0:
+        return np.zeros((0, 0))
 
+    vectors = encode_texts(flat_texts, model_name).astype(np.float64)
 
-def embed_multi_vector(df: pd.DataFrame, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2") -> list:
-    """Multi-vector 임베딩: 논문당 여러 벡터 (title, abstract chunks, note chunks)"""
-    from sentence_transformers import SentenceTransformer
+    # 섹션별 청크 평균 (S, dim)
+    seg_starts = np.array(seg_starts)
+    seg_sizes = np.diff(np.append(seg_starts, len(flat_texts)))
+    seg_means = np.add.reduceat(vectors, seg_starts, axis=0) / seg_sizes[:, None]
 
-    print(f"Loading model: {model_name}")
-    model = SentenceTransformer(model_name)
+    # 논문별 가중 평균 (N, dim)
+    weights = np.array(seg_weights)
+    paper_starts = np.array(paper_starts)
+    weighted_sum = np.add.reduceat(seg_means * weights[:, None], paper_starts, axis=0)
+    weight_sum = np.add.reduceat(weights, paper_starts)
 
-    all_embeddings = []  # list of lists
-    total = len(df)
-    total_vectors = 0
+    print(f"  Processed {total}/{total}")
+    return weighted_sum / weight_sum[:, None]
 
-    print(f"Embedding {total} papers with multi-vector approach...")
 
-    for idx, (_, row) in enumerate(df.iterrows()):
-        if (idx + 1) % 50 == 0 or idx == 0:
-            print(f"  Processed {idx + 1}/{total} (total vectors: {total_vectors})")
+def multi_vector_texts(row) -> list:
+    """논문 하나의 multi-vector 입력 텍스트 (title, abstract chunks, note chunks 순서)"""
+    texts = []
 
-        paper_embs = []
+    # Title (always include)
+    title = row.get("Title", "")
+    if pd.notna(title) and title and str(title).lower() != "nan":
+        texts.append(str(title))
 
-        # Title (always include)
-        title = row.get("Title", "")
-        if pd.notna(title) and title and str(title).lower() != "nan":
-            title_emb = model.encode(str(title))
-            paper_embs.append(title_emb.tolist())
+    # Abstract chunks
+    abstract = row.get("Abstract Note", "")
+    if pd.notna(abstract) and abstract and str(abstract).lower() != "nan":
+        texts.extend(chunk_text(str(abstract)))
 
-        # Abstract chunks
-        abstract = row.get("Abstract Note", "")
-        if pd.notna(abstract) and abstract and str(abstract).lower() != "nan":
-            abstract_str = str(abstract)
-            chunks = chunk_text(abstract_str)
-            for chunk in chunks:
-                chunk_emb = model.encode(chunk)
-                paper_embs.append(chunk_emb.tolist())
+    # Note chunks
+    notes = row.get("Notes", "")
+    if pd.notna(notes) and notes and str(notes).lower() != "nan":
+        notes_text = extract_text_from_html(str(notes))
+        if notes_text:
+            texts.extend(chunk_text(notes_text))
 
-        # Note chunks
-        notes = row.get("Notes", "")
-        if pd.notna(notes) and notes and str(notes).lower() != "nan":
-            notes_text = extract_text_from_html(str(notes))
-            if notes_text:
-                chunks = chunk_text(notes_text)
-                for chunk in chunks:
-                    chunk_emb = model.encode(chunk)
-                    paper_embs.append(chunk_emb.tolist())
+    # Fallback: at least title
+    if not texts:
+        fallback_title = row.get("Title", "Untitled")
+        texts.append(str(fallback_title) if pd.notna(fallback_title) else "Untitled")
 
-        # Fallback: at least title
-        if not paper_embs:
-            fallback_title = row.get("Title", "Untitled")
-            fallback_emb = model.encode(str(fallback_title) if pd.notna(fallback_title) else "Untitled")
-            paper_embs.append(fallback_emb.tolist())
+    return texts
 
-        all_embeddings.append(paper_embs)
-        total_vectors += len(paper_embs)
 
-    print(f"  Processed {total}/{total}")
-    print(f"  Total vectors: {total_vectors} (avg {total_vectors/total:.1f} per paper)")
-    return all_embeddings
+def embed_multi_vector(df: pd.DataFrame, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2") -> list:
+    """Multi-vector 임베딩: 논문당 여러 벡터 (title, abstract chunks, note chunks)
 
+    모든 논문의 텍스트를 하나의 평탄한 리스트로 모아(offsets로 논문 경계 기록)
+    한꺼번에 배치 인코딩한 뒤 논문별 리스트로 다시 나눈다.
+    """
+    total = len(df)
+    print(f"Embedding {total} papers with multi-vector approach...")
 
-def embed_with_openai(texts: list, model: str = "text-embedding-3-small") -> np.ndarray:
-    """OpenAI API로 임베딩"""
-    import openai
+    flat_texts = []
+    offsets = [0]
+    for _, row in df.iterrows():
+        flat_texts.extend(multi_vector_texts(row))
+        offsets.append(len(flat_texts))
 
-    print(f"Embedding {len(texts)} texts with OpenAI {model}...")
-    embeddings = []
+    total_vectors = len(flat_texts)
+    print(f"  Collected {total_vectors} chunks, encoding in batches of {EMBED_SETTINGS['batch_size']}...")
+    vectors = encode_texts(flat_texts, model_name)
 
-    # 배치 처리 (API 제한 고려)
-    batch_size = 100
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i+batch_size]
-        # 텍스트 길이 제한 (8000자)
-        batch = [t[:8000] if t else " " for t in batch]
+    all_embeddings = [vectors[offsets[i]:offsets[i + 1]].tolist() for i in range(total)]
 
-        resp = openai.embeddings.create(model=model, input=batch)
-        for item in resp.data:
-            embeddings.append(item.embedding)
+    print(f"  Total vectors: {total_vectors} (avg {total_vectors/max(total, 1):.1f} per paper)")
+    return all_embeddings
 
-        print(f"  Processed {min(i+batch_size, len(texts))}/{len(texts)}")
 
-    return np.array(embeddings)
+def embed_with_openai(texts: list, model: str = None) -> np.ndarray:
+    """OpenAI API로 임베딩 (동시 요청 + rate limit + 재시도, 중단 시 이어서 진행)"""
+    model = model or OPENAI_SETTINGS["model"]
+    dimensions = OPENAI_SETTINGS["dimensions"]
+    print(f"Embedding {len(texts)} texts with OpenAI {model}"
+          f"{f' ({dimensions} dims)' if dimensions else ''}...")
+    # 텍스트 길이 제한 (8000자) - 캐시 키도 실제 전송 텍스트 기준
+    texts = [t[:8000] if t else " " for t in texts]
+
+    client = OpenAIEmbeddingClient(
+        model, dimensions,
+        concurrency=OPENAI_SETTINGS["concurrency"],
+        rpm=OPENAI_SETTINGS["rpm"],
+        tpm=OPENAI_SETTINGS["tpm"],
+    )
+    key = f"openai/{model}" + (f"@{dimensions}" if dimensions else "")
+    return encode_unique(texts, lambda unique: cached_encode(
+        EMBED_SETTINGS["cache"], key, unique,
+        lambda missing: client.embed(missing, OPENAI_SETTINGS["checkpoint"])
+    ))
 
 
 # ============================================================
@@ -712,6 +962,103 @@ def load_from_api() -> pd.DataFrame:
     return df
 
 
+def item_version(row) -> str:
+    """변경 감지용 버전 문자열
+
+    API: 아이템 version + 자식 노트 version (노트만 수정돼도 부모 version은 그대로이므로)
+    CSV: Date Modified 컬럼
+    """
+    item = row.get("_zotero_item")
+    if isinstance(item, dict):
+        note_versions = sorted(f"{n.get('key', '')}:{n.get('version', '')}" for n in item.get("_notes", []))
+        return ";".join([f"{item.get('version', '')}@{item['data'].get('dateModified', '')}", *note_versions])
+
+    date_modified = row.get("Date Modified", "")
+    return str(date_modified) if pd.notna(date_modified) and date_modified else ""
+
+
+def embedder_meta(embedding: str) -> dict:
+    """벡터를 만든 설정 (meta에 기록, 증분 빌드는 모두 같을 때만 재사용)"""
+    if embedding == "openai":
+        # 차원 수가 다르면 벡터 길이가 달라 한 배열에 섞을 수 없음
+        return {"openai_model": OPENAI_SETTINGS["model"], "openai_dimensions": OPENAI_SETTINGS["dimensions"]}
+    return {"embed_backend": EMBED_SETTINGS["backend"]}
+
+
+# 이 값들을 기록하기 전의 빌드가 쓰던 설정
+LEGACY_EMBEDDER_META = {"embed_backend": "torch", "openai_model": "text-embedding-3-small", "openai_dimensions": None}
+
+
+def load_previous_build(path: str, embedding: str) -> dict:
+    """이전 papers.json에서 재사용 가능한 레코드 로드 (zotero_key -> record)
+
+    같은 임베딩 방식·백엔드·OpenAI 모델/차원으로 만들어진 빌드만 재사용한다
+    (fp32/int8 벡터나 길이가 다른 벡터가 섞이지 않도록).
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        print("  No previous build found, doing full rebuild")
+        return {}
+
+    if not isinstance(previous, dict) or previous.get("meta", {}).get("embedding") != embedding:
+        print("  Previous build used a different embedding mode, doing full rebuild")
+        return {}
+    if previous["meta"].get("note_extractor", 1) != NOTE_EXTRACTOR_VERSION:
+        print("  Previous build used a different note extractor, doing full rebuild")
+        return {}
+    for name, value in embedder_meta(embedding).items():
+        used = previous["meta"].get(name, LEGACY_EMBEDDER_META.get(name))
+        if used != value:
+            print(f"  Previous build used {name}={used}, not {value}, doing full rebuild")
+            return {}
+
+    field = "embeddings" if embedding == "multi" else "embedding"
+    papers = previous.get("papers", [])
+    if previous["meta"].get("embedding_store") == "sidecar":
+        # 사이드카의 벡터를 레코드에 붙여서 인라인 빌드와 같은 형태로
+        vectors, offsets, norms = load_sidecar(path, previous["meta"].get("embedding_sidecar_id"), len(papers))
+        if vectors is None:
+            print("  Previous embedding sidecar missing or out of date, doing full rebuild")
+            return {}
+        for p in papers:
+            rows = paper_rows(vectors, offsets, p["id"], norms)
+            p[field] = rows if embedding == "multi" else rows[0]
+
+    return {
+        p["zotero_key"]: p for p in papers
+        if p.get("zotero_key") and p.get("version") and len(p.get(field, [])) > 0
+    }
+
+
+def previous_cluster_count(path: str) -> int:
+    """이전 papers.json의 클러스터 수 (auto-k warm start용)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        return int(previous["meta"]["clusters"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def embed_papers(df: pd.DataFrame, embedding: str) -> list:
+    """논문별 벡터 계산 (multi: 논문당 벡터 리스트, 그 외: 논문당 벡터 1개)"""
+    if embedding == "multi":
+        # Multi-vector: 논문당 여러 벡터 (추천)
+        return embed_multi_vector(df, "paraphrase-multilingual-MiniLM-L12-v2")
+    if embedding == "weighted":
+        # 청킹 + 섹션별 가중치 (legacy)
+        return embed_with_weighted_sections(df, "paraphrase-multilingual-MiniLM-L12-v2").tolist()
+
+    texts = [build_text_for_embedding(row) for _, row in df.iterrows()]
+    if embedding == "local":
+        return embed_with_sentence_transformers(texts, "paraphrase-multilingual-MiniLM-L12-v2").tolist()
+    if embedding == "local-large":
+        return embed_with_sentence_transformers(texts, "paraphrase-multilingual-mpnet-base-v2").tolist()
+    return embed_with_openai(texts).tolist()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Build paper map from Zotero CSV or API")
     parser.add_argument("--output", default="papers.json", help="Output JSON file")
@@ -719,8 +1066,55 @@ def main():
                         help="Data source: csv (default) or api (Zotero API)")
     parser.add_argument("--embedding", choices=["multi", "local", "local-large", "weighted", "openai"], default="multi",
                         help="Embedding: multi (multi-vector, recommended), weighted (legacy), local, local-large, openai")
+    parser.add_argument("--embed-batch-size", type=int, default=EMBED_SETTINGS["batch_size"],
+                        help="Texts per encode batch (library-wide, length-bucketed)")
+    parser.add_argument("--embed-workers", type=int, default=1,
+                        help="Embedding worker processes (one model per worker)")
+    parser.add_argument("--embed-threads", type=int, default=0,
+                        help="Intra-op threads per embedding worker (0 = cores / workers)")
+    parser.add_argument("--embed-backend", choices=BACKENDS, default="torch",
+                        help="Inference backend: torch (fp32) or onnx-int8 (quantized, see embedding_backend.py)")
+    parser.add_argument("--embed-model-dir", default=None,
+                        help="Exported ONNX model directory (default: models/<model>-onnx)")
+    parser.add_argument("--openai-dimensions", type=int, default=None,
+                        help="OpenAI embedding dimensions (smaller stored vectors)")
+    parser.add_argument("--openai-concurrency", type=int, default=OPENAI_SETTINGS["concurrency"],
+                        help="Concurrent OpenAI embedding requests")
+    parser.add_argument("--openai-rpm", type=int, default=OPENAI_SETTINGS["rpm"],
+                        help="OpenAI requests per minute limit")
+    parser.add_argument("--openai-tpm", type=int, default=OPENAI_SETTINGS["tpm"],
+                        help="OpenAI tokens per minute limit")
+    parser.add_argument("--embedding-format", choices=FORMATS, default="json",
+                        help="Embedding storage in papers.json: json (float lists), float16, int8 (per-vector scaled)")
+    parser.add_argument("--embedding-sidecar", choices=SIDECAR_DTYPES, default=None,
+                        help="Write embeddings to papers.embeddings.npy + papers.offsets.npy (float32 | float16) "
+                             "instead of papers.json")
+    parser.add_argument("--embedding-cache", default="embedding_cache.sqlite",
+                        help="Persistent embedding cache file (SQLite)")
+    parser.add_argument("--no-embedding-cache", action="store_true",
+                        help="Disable the embedding cache")
+    parser.add_argument("--cache-max-mb", type=float, default=1024,
+                        help="Evict least-recently-used cache entries above this size (0 = no limit)")
+    parser.add_argument("--cache-max-age-days", type=float, default=90,
+                        help="Evict cache entries unused for this many days (0 = keep forever)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reuse embeddings from the previous output for items whose Zotero version is unchanged")
     parser.add_argument("--clusters", type=int, default=0,
                         help="Number of clusters (0 = auto-detect optimal k)")
+    parser.add_argument("--cluster-sample-size", type=int, default=5000,
+                        help="Papers sampled for the auto-k silhouette score (0 = all)")
+    parser.add_argument("--cluster-jobs", type=int, default=0,
+                        help="Parallel processes for the auto-k search (0 = all cores)")
+    parser.add_argument("--cluster-match-threshold", type=float, default=0.5,
+                        help="Reuse a previous cluster's ID/label when member Jaccard overlap is at least this")
+    parser.add_argument("--warm-start-k", action="store_true",
+                        help="Auto-k: search around the previous build's k first")
+    parser.add_argument("--place-new", action="store_true",
+                        help="Keep existing map positions; project only new papers with the saved map model")
+    parser.add_argument("--map-model", default="map_model.joblib",
+                        help="Saved scalers/reducer/KMeans for --place-new")
+    parser.add_argument("--refit-threshold", type=float, default=0.2,
+                        help="--place-new: full refit when added+removed papers exceed this fraction")
     parser.add_argument("--dim-reduction", choices=["tsne", "pca", "umap"], default="umap",
                         help="Dimensionality reduction method (umap recommended)")
     parser.add_argument("--min-dist", type=float, default=0.3,
@@ -730,6 +1124,17 @@ def main():
     parser.add_argument("--notes-only", action="store_true", default=True,
                         help="Only include items with notes")
     args = parser.parse_args()
+    EMBED_SETTINGS["batch_size"] = args.embed_batch_size
+    EMBED_SETTINGS["workers"] = max(1, args.embed_workers)
+    EMBED_SETTINGS["threads"] = args.embed_threads
+    EMBED_SETTINGS["backend"] = args.embed_backend
+    EMBED_SETTINGS["model_dir"] = args.embed_model_dir
+    OPENAI_SETTINGS.update(dimensions=args.openai_dimensions, concurrency=args.openai_concurrency,
+                           rpm=args.openai_rpm, tpm=args.openai_tpm)
+    if not args.no_embedding_cache:
+        EMBED_SETTINGS["cache"] = EmbeddingCache(
+            args.embedding_cache, max_mb=args.cache_max_mb, max_age_days=args.cache_max_age_days
+        )
 
     # 1. 데이터 로드 (CSV 또는 API)
     try:
@@ -769,56 +1174,89 @@ def main():
 
     # 2. 메타데이터 처리
     print("\n[2/5] Processing metadata...")
-    df["year_clean"] = df["Publication Year"].apply(parse_year)
-    df["age"] = df["year_clean"].apply(lambda y: CURRENT_YEAR - y if y else None)
-    median_age = df["age"].median()
-    df["age"] = df["age"].fillna(median_age)
-
-    df["venue_quality"] = df.apply(get_venue_score, axis=1)
-    df["type_score"] = df["Item Type"].apply(get_type_score)
-
-    # is_paper 플래그 (논문 vs 앱/서비스)
-    df["is_paper"] = df["Item Type"].isin(["conferencePaper", "journalArticle", "bookSection", "preprint", "book"])
+    df = process_metadata(df)
 
     print(f"  Papers: {df['is_paper'].sum()}, Apps/Services: {(~df['is_paper']).sum()}")
 
     # 3. 텍스트 임베딩
     print("\n[3/5] Building embeddings...")
 
-    use_multi_vector = False
+    df["version"] = [item_version(row) for _, row in df.iterrows()]
+    keys = df["Key"].fillna("").astype(str).tolist() if "Key" in df.columns else [""] * len(df)
+    field = "embeddings" if args.embedding == "multi" else "embedding"
+
+    # 증분 빌드: version이 같은 아이템은 이전 벡터/노트 텍스트 재사용
+    previous = load_previous_build(args.output, args.embedding) if args.incremental else {}
+    reused = {}  # df 인덱스 -> 이전 레코드
+    for i, (key, version) in enumerate(zip(keys, df["version"])):
+        prev = previous.get(key)
+        if prev and prev["version"] == version:
+            reused[i] = prev
+
+    if args.incremental and previous:
+        deleted = len(set(previous) - set(keys))
+        print(f"  Incremental: {len(reused)} unchanged, {len(df) - len(reused)} new/changed, {deleted} deleted")
+
+    changed_idx = [i for i in range(len(df)) if i not in reused]
+    new_vectors = embed_papers(df.iloc[changed_idx].reset_index(drop=True), args.embedding) if changed_idx else []
+    paper_vectors = [decode_vectors(reused[i][field]) if i in reused else None for i in range(len(df))]
+    for i, vec in zip(changed_idx, new_vectors):
+        paper_vectors[i] = vec
+
+    use_multi_vector = args.embedding == "multi"
     multi_vector_embeddings = None  # 시맨틱 서치용 (논문당 여러 벡터)
-    if args.embedding == "multi":
-        # Multi-vector: 논문당 여러 벡터 (추천)
-        multi_vector_embeddings = embed_multi_vector(df, "paraphrase-multilingual-MiniLM-L12-v2")
-        use_multi_vector = True
+    if use_multi_vector:
+        multi_vector_embeddings = paper_vectors
         print(f"  Multi-vector embeddings: {len(multi_vector_embeddings)} papers")
         # UMAP용 평균 벡터 계산 (multi_vector_embeddings는 이미 list of lists)
         embeddings = np.array([np.mean(np.array(vecs), axis=0) for vecs in multi_vector_embeddings])
         print(f"  Mean embedding shape for UMAP: {embeddings.shape}")
-    elif args.embedding == "weighted":
-        # 청킹 + 섹션별 가중치 (legacy)
-        embeddings = embed_with_weighted_sections(df, "paraphrase-multilingual-MiniLM-L12-v2")
-        print(f"  Embedding shape: {embeddings.shape}")
-    elif args.embedding == "local":
-        texts = [build_text_for_embedding(row) for _, row in df.iterrows()]
-        embeddings = embed_with_sentence_transformers(texts, "paraphrase-multilingual-MiniLM-L12-v2")
-        print(f"  Embedding shape: {embeddings.shape}")
-    elif args.embedding == "local-large":
-        texts = [build_text_for_embedding(row) for _, row in df.iterrows()]
-        embeddings = embed_with_sentence_transformers(texts, "paraphrase-multilingual-mpnet-base-v2")
-        print(f"  Embedding shape: {embeddings.shape}")
     else:
-        texts = [build_text_for_embedding(row) for _, row in df.iterrows()]
-        embeddings = embed_with_openai(texts)
+        embeddings = np.array(paper_vectors)
         print(f"  Embedding shape: {embeddings.shape}")
 
+    shutdown_embedding_pools()
+
+    if EMBED_STATS["chunks"]:
+        saved = EMBED_STATS["chunks"] - EMBED_STATS["unique"]
+        print(f"  Dedup: {EMBED_STATS['unique']}/{EMBED_STATS['chunks']} unique chunks, "
+              f"{saved} encodes saved ({saved / EMBED_STATS['chunks']:.1%})")
+
+    cache = EMBED_SETTINGS["cache"]
+    if cache is not None:
+        evicted = cache.evict()
+        stats = cache.stats()
+        print(f"  Embedding cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['entries']} entries ({stats['bytes'] / 1024 / 1024:.1f} MB), evicted {evicted}")
+
     # 4. 메타데이터 feature 결합
     print("\n[4/5] Combining features and reducing dimensions...")
     meta_features = df[["venue_quality", "type_score", "age"]].values
 
+    # --place-new: 저장된 모델로 새 논문만 배치 (기존 좌표/클러스터 고정)
+    map_model = load_map_model(args.map_model, args.embedding, args.dim_reduction) if args.place_new else None
+    positions = {}
+    if map_model:
+        # 좌표/클러스터는 이 모델로 만든 빌드의 것이어야 함 (중간에 다른 빌드가 덮어썼으면 재학습)
+        output_build_id, positions = previous_positions(args.output)
+        if output_build_id != map_model["build_id"]:
+            print(f"  {args.output} was not built from {args.map_model}, doing full refit")
+            map_model, positions = None, {}
+    if map_model:
+        drift = map_drift(map_model["keys"], keys)
+        if drift > args.refit_threshold:
+            print(f"  Drift {drift:.1%} > {args.refit_threshold:.0%}, doing full refit")
+            map_model = None
+    fixed_idx, new_idx = [], []
+    if map_model:
+        for i, key in enumerate(keys):
+            (fixed_idx if key in positions else new_idx).append(i)
+        print(f"  Place-new: {len(fixed_idx)} fixed, {len(new_idx)} new (drift {drift:.1%})")
+    map_build_id = map_model["build_id"] if map_model else new_build_id()
+
     # 스케일링
-    scaler = StandardScaler()
-    meta_scaled = scaler.fit_transform(meta_features)
+    scaler = map_model["scaler"] if map_model else StandardScaler()
+    meta_scaled = scaler.transform(meta_features) if map_model else scaler.fit_transform(meta_features)
 
     # 가중치 적용 (venue, type, age)
     weights = np.array([1.5, 1.0, 0.5])
@@ -826,20 +1264,39 @@ def main():
 
     # 임베딩 + 메타데이터 결합
     # 임베딩도 스케일링
-    emb_scaler = StandardScaler()
-    emb_scaled = emb_scaler.fit_transform(embeddings)
+    emb_scaler = map_model["emb_scaler"] if map_model else StandardScaler()
+    emb_scaled = emb_scaler.transform(embeddings) if map_model else emb_scaler.fit_transform(embeddings)
 
     # 메타데이터 비중 조절 (임베딩 대비 0.3 정도)
     combined = np.hstack([emb_scaled, meta_scaled * 0.3])
 
+    # 서버의 "비슷한 논문" 사이드카: 내용(정규화된 임베딩)만으로 본 이웃 (venue/type/age 제외)
+    knn = build_knn_graph(normalize(embeddings), n_neighbors=N_NEIGHBORS)
+    if knn:
+        print(f"  kNN graph: {knn[0].shape[0]} x {knn[0].shape[1]} (pynndescent, cosine, content only)")
+    # UMAP 입력 공간(임베딩 + 메타데이터)은 위 그래프와 달라 NNDescent 1회를 공유할 수 없음.
+    # 작은 라이브러리는 UMAP이 precomputed_knn을 무시하므로 큰 라이브러리의 전체 학습 때만 만듦
+    umap_knn = None
+    if not map_model and args.dim_reduction == "umap" and len(combined) >= UMAP_SMALL_DATA:
+        umap_knn = build_knn_graph(combined, n_neighbors=N_NEIGHBORS)
+
     # 차원 축소
-    if args.dim_reduction == "umap":
+    reducer = None
+    if map_model:
+        reducer = map_model["reducer"]
+        coords = np.empty((len(df), 2))
+        for i in fixed_idx:
+            coords[i] = positions[keys[i]][:2]
+        if new_idx:
+            coords[new_idx] = reducer.transform(combined[new_idx])
+    elif args.dim_reduction == "umap":
         reducer = umap.UMAP(
             n_components=2,
-            n_neighbors=15,
+            n_neighbors=N_NEIGHBORS,
             min_dist=args.min_dist,
             metric='cosine',
-            random_state=42
+            random_state=42,
+            precomputed_knn=umap_knn if umap_knn else (None, None, None),
         )
         coords = reducer.fit_transform(combined)
         print(f"  UMAP: min_dist={args.min_dist}")
@@ -854,123 +1311,81 @@ def main():
         tsne = TSNE(n_components=2, random_state=42, perplexity=min(30, len(df)-1))
         coords = tsne.fit_transform(combined_reduced)
     else:
-        pca = PCA(n_components=2, random_state=42)
-        coords = pca.fit_transform(combined)
+        reducer = PCA(n_components=2, random_state=42)
+        coords = reducer.fit_transform(combined)
 
     df["x"] = coords[:, 0]
     df["y"] = coords[:, 1]
 
     # 5. 클러스터링
+    # 이전 빌드의 클러스터 (안정적인 ID/라벨 재사용용)
+    previous_members, previous_labels = load_previous_clusters(args.output)
     n_clusters = args.clusters
-    if n_clusters == 0:
-        # 최적 k 탐색 (Silhouette score)
-        print("\n[5/5] Finding optimal number of clusters...")
-        k_range = range(5, min(20, len(df) // 10))
-        best_k = 10
-        best_score = -1
-        scores = []
-
-        for k in k_range:
-            kmeans_test = KMeans(n_clusters=k, random_state=42, n_init=10)
-            labels = kmeans_test.fit_predict(combined)
-            score = silhouette_score(combined, labels)
-            scores.append((k, score))
-            print(f"  k={k}: silhouette={score:.3f}")
-            if score > best_score:
-                best_score = score
-                best_k = k
-
-        n_clusters = best_k
-        print(f"\n  → Best k={best_k} (silhouette={best_score:.3f})")
+    if map_model:
+        kmeans = map_model["kmeans"]
+        n_clusters = kmeans.n_clusters
+        cluster_ids = map_model.get("cluster_ids", list(range(n_clusters)))
+        print(f"\n[5/5] Assigning new papers to {n_clusters} existing clusters...")
+        clusters = np.empty(len(df), dtype=int)
+        for i in fixed_idx:
+            clusters[i] = positions[keys[i]][2]
+        if new_idx:
+            clusters[new_idx] = [cluster_ids[c] for c in kmeans.predict(combined[new_idx])]
+        df["cluster"] = clusters
+        # ID가 고정이므로 이전 라벨 그대로 사용
+        reuse_labels = {c for c in cluster_ids if c in previous_labels}
     else:
-        print(f"\n[5/5] Clustering into {n_clusters} clusters...")
-
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    df["cluster"] = kmeans.fit_predict(combined)
+        if n_clusters == 0:
+            # 최적 k 탐색 (Silhouette score)
+            print("\n[5/5] Finding optimal number of clusters...")
+            k_range = range(5, min(20, len(df) // 10))
+            previous_k = previous_cluster_count(args.output) if args.warm_start_k else None
+            best_k, scores = find_best_k(combined, k_range, sample_size=args.cluster_sample_size,
+                                         n_jobs=args.cluster_jobs, previous_k=previous_k)
+            best_score = scores.get(best_k, -1)
+
+            n_clusters = best_k
+            print(f"\n  → Best k={best_k} (silhouette={best_score:.3f})")
+        else:
+            print(f"\n[5/5] Clustering into {n_clusters} clusters...")
+
+        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+        kmeans_labels = kmeans.fit_predict(combined).tolist()
+
+        # 이전 클러스터와 멤버 겹침으로 매칭 (Hungarian) -> 이전 ID/라벨 재사용
+        mapping, matched = align_clusters(kmeans_labels, keys, previous_members, n_clusters,
+                                         args.cluster_match_threshold)
+        cluster_ids = [mapping[c] for c in range(n_clusters)]
+        df["cluster"] = [cluster_ids[c] for c in kmeans_labels]
+        reuse_labels = {old for old in matched.values() if old in previous_labels}
+        if previous_members:
+            moved = sum(1 for key, c in zip(keys, df["cluster"]) if key in previous_members and previous_members[key] != c)
+            print(f"  Stable IDs: {len(matched)}/{n_clusters} clusters matched previous build, {moved} papers moved")
+
+        if reducer is not None:
+            save_map_model(args.map_model, map_build_id, args.embedding, args.dim_reduction, keys,
+                           scaler, emb_scaler, reducer, kmeans, cluster_ids)
+            print(f"  Saved map model: {args.map_model}")
 
     # 6. 클러스터 라벨 생성 (TF-IDF 키워드)
     print("\nGenerating cluster labels...")
-    cluster_texts = {}
-    for idx, row in df.iterrows():
-        c = int(row["cluster"])
-        title = row.get('Title', '') if pd.notna(row.get('Title', '')) else ''
-        abstract = row.get('Abstract Note', '') if pd.notna(row.get('Abstract Note', '')) else ''
-        notes = row.get('Notes', '') if pd.notna(row.get('Notes', '')) else ''
-        notes_text = extract_text_from_html(notes) if notes else ''
-        text = f"{title} {abstract} {notes_text}"
-        cluster_texts[c] = cluster_texts.get(c, "") + " " + str(text)
-
-    corpus = [cluster_texts.get(i, "") for i in range(n_clusters)]
-
-    # 한국어 조사 제거 전처리
-    def strip_korean_particles(text):
-        import re
-        # 조사 패턴 (단어 끝에 붙는 것들)
-        particles = r'(을|를|이|가|은|는|에|의|로|으로|와|과|도|만|까지|부터|에서|으로서|이라|라|란|라는|이라는)$'
-        words = text.split()
-        cleaned = []
-        for word in words:
-            # 한글 단어에서 조사 제거
-            if re.search(r'[가-힣]', word):
-                cleaned_word = re.sub(particles, '', word)
-                if len(cleaned_word) >= 2:  # 너무 짧아지면 원본 유지
-                    cleaned.append(cleaned_word)
-                else:
-                    cleaned.append(word)
-            else:
-                cleaned.append(word)
-        return ' '.join(cleaned)
-
-    corpus = [strip_korean_particles(c) for c in corpus]
-
-    # 다국어 불용어 (영어 + 한국어)
-    multilingual_stop_words = [
-        # English
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
-        'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been', 'be', 'have', 'has', 'had',
-        'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must',
-        'this', 'that', 'these', 'those', 'it', 'its', 'we', 'our', 'they', 'their', 'them',
-        'can', 'also', 'more', 'how', 'what', 'which', 'who', 'when', 'where', 'why',
-        'using', 'use', 'used', 'based', 'through', 'between', 'into', 'such', 'than',
-        'study', 'research', 'paper', 'results', 'findings', 'analysis', 'data', 'method',
-        # Korean
-        '및', '등', '를', '을', '이', '가', '은', '는', '에', '의', '로', '으로', '와', '과',
-        '하는', '있는', '되는', '한', '된', '수', '것', '대한', '통해', '위해', '대해',
-        '연구', '기술', '위한', '사용', '제안', '보여', '제시', '기반', '활용', '가능',
-        '사용자', '논문', '시스템', '인터페이스', '사람', '정보', '방법', '결과',
-        '모델', '분석', '설계', '개발', '평가', '실험', '참여자', '프로세스',
-    ]
-
-    tfidf_vec = TfidfVectorizer(
-        max_features=500,
-        stop_words=multilingual_stop_words,
-        ngram_range=(1, 2),
-        min_df=1,
-        token_pattern=r'(?u)\b[가-힣a-zA-Z]{2,}\b'  # 한글/영어 2글자 이상
+    label_ids = sorted(cluster_ids)
+    paper_texts = (
+        f"{title} {abstract} {extract_text_from_html(notes) if notes else ''}"
+        for title, abstract, notes in zip(text_column(df, "Title"), text_column(df, "Abstract Note"),
+                                          text_column(df, "Notes"))
     )
-    tfidf_matrix = tfidf_vec.fit_transform(corpus)
-    feature_names = tfidf_vec.get_feature_names_out()
-    tfidf_dense = tfidf_matrix.toarray()
-
-    # 각 단어가 몇 개의 클러스터에서 등장하는지 계산
-    term_cluster_count = (tfidf_dense > 0).sum(axis=0)
-
-    cluster_labels = {}
-    for i in range(n_clusters):
-        scores = tfidf_dense[i].copy()
-        # 여러 클러스터에 등장하는 단어는 점수 강하게 낮춤 (1/n² 패널티)
-        distinctiveness = 1.0 / np.maximum(term_cluster_count, 1) ** 2
-        adjusted_scores = scores * distinctiveness
-
-        top_idx = adjusted_scores.argsort()[-3:][::-1]  # 상위 3개 키워드
-        keywords = [feature_names[j] for j in top_idx if scores[j] > 0]
-        cluster_labels[i] = ", ".join(keywords[:3]) if keywords else f"Cluster {i}"
-        print(f"  Cluster {i}: {cluster_labels[i]}")
+    term_counts, terms = cluster_term_counts(paper_texts, df["cluster"], label_ids)
+    cluster_labels = ctfidf_labels(term_counts, terms, label_ids)
+    for c in label_ids:
+        if c in reuse_labels:
+            cluster_labels[c] = previous_labels[c]
+        print(f"  Cluster {c}: {cluster_labels[c]}" + (" (kept)" if c in reuse_labels else ""))
 
     # 6.5. 클러스터 중심점 계산 (2D 좌표 기준)
     print("\nCalculating cluster centroids...")
     cluster_centroids = {}
-    for i in range(n_clusters):
+    for i in label_ids:
         cluster_points = df[df["cluster"] == i][["x", "y"]].values
         if len(cluster_points) > 0:
             centroid_x = float(np.mean(cluster_points[:, 0]))
@@ -978,6 +1393,27 @@ def main():
             cluster_centroids[i] = {"x": centroid_x, "y": centroid_y}
             print(f"  Cluster {i}: ({centroid_x:.2f}, {centroid_y:.2f})")
 
+    # 6.6. 줌 레벨용 계층 클러스터 (KMeans 중심점 위 Ward 트리)
+    cluster_hierarchy = build_hierarchy(kmeans.cluster_centers_, cluster_ids)
+    if cluster_hierarchy:
+        print("\nBuilding cluster hierarchy...")
+        for level in cluster_hierarchy["levels"]:
+            if level["k"] == n_clusters:
+                # 리프 노드 i = KMeans 라벨 i (클러스터 ID는 leaves[i])
+                level["labels"] = {node: cluster_labels[c] for node, c in enumerate(cluster_ids)}
+                level["centroids"] = {node: cluster_centroids[c] for node, c in enumerate(cluster_ids)
+                                      if c in cluster_centroids}
+                continue
+            node_of = leaf_to_node(cluster_hierarchy, level["nodes"])
+            groups = df["cluster"].map(node_of)
+            level_counts = group_counts(term_counts, label_ids, node_of, level["nodes"])
+            level["labels"] = ctfidf_labels(level_counts, terms, level["nodes"])
+            level["centroids"] = {
+                int(node): {"x": float(points["x"].mean()), "y": float(points["y"].mean())}
+                for node, points in df[["x", "y"]].groupby(groups)
+            }
+            print(f"  k={level['k']}: " + " | ".join(level["labels"].values()))
+
     # 7. JSON 출력
     print(f"\nWriting {args.output}...")
 
@@ -1005,51 +1441,59 @@ def main():
     except:
         pass
 
+    # 레코드 출력용 컬럼 (행 단위 접근 대신 컬럼 배열로)
+    # 값은 이전 행 단위 출력과 동일하게 (빈 문자열만 다음 venue 컬럼으로 넘어가고, NaN은 "nan")
+    venues_full = [
+        str(p or q or c or "") for p, q, c in zip(record_column(df, "Publication Title"),
+                                                  record_column(df, "Proceedings Title"),
+                                                  record_column(df, "Conference Name"))
+    ]
+    years = [int(y) if pd.notna(y) else None for y in df["year_clean"]]
+
+    columns = zip(
+        record_text(df, "Key"), record_text(df, "Title"), years, record_text(df, "Author"), venues_full,
+        record_text(df, "Item Type"), df["is_paper"], df["is_review"], df["venue_quality"],
+        df["x"], df["y"], df["cluster"], record_text(df, "Url"), record_text(df, "DOI"),
+        record_text(df, "PDF Key"), record_text(df, "Abstract Note"), text_column(df, "Manual Tags"),
+        text_column(df, "Notes"), df["version"],
+    )
+
     records = []
     review_count = 0
-    for idx, (_, row) in enumerate(df.iterrows()):
-        # 기존 태그 가져오기
-        raw_tags = row.get("Manual Tags", "")
-        manual_tags = str(raw_tags) if pd.notna(raw_tags) and raw_tags else ""
-
+    for idx, (key, title, year, authors, venue_full, item_type, is_paper, is_review, venue_quality,
+              x, y, cluster, url, doi, pdf_key, abstract, manual_tags, notes, version) in enumerate(columns):
         # method-review 자동 태깅
-        title = str(row.get("Title", "") or "")
-        abstract = str(row.get("Abstract Note", "") or "")
-        if is_review_paper(title, abstract):
-            if "method-review" not in manual_tags:
-                if manual_tags:
-                    manual_tags = f"{manual_tags}; method-review"
-                else:
-                    manual_tags = "method-review"
-                review_count += 1
+        if is_review and "method-review" not in manual_tags:
+            manual_tags = f"{manual_tags}; method-review" if manual_tags else "method-review"
+            review_count += 1
 
         rec = {
-            "id": int(idx),
-            "zotero_key": str(row.get("Key", "") or ""),  # Zotero item key for API sync
+            "id": idx,
+            "zotero_key": key,  # Zotero item key for API sync
             "title": title,
-            "year": int(row["year_clean"]) if pd.notna(row["year_clean"]) else None,
-            "authors": str(row.get("Author", "") or ""),
-            "venue": get_venue_abbrev(venue_full := str(row.get("Publication Title", "") or row.get("Proceedings Title", "") or row.get("Conference Name", "") or "")),
+            "year": year,
+            "authors": authors,
+            "venue": get_venue_abbrev(venue_full),
             "venue_full": venue_full,
-            "item_type": str(row.get("Item Type", "") or ""),
-            "is_paper": bool(row["is_paper"]),
-            "venue_quality": float(row["venue_quality"]),
-            "x": float(row["x"]),
-            "y": float(row["y"]),
-            "cluster": int(row["cluster"]),
-            "cluster_label": cluster_labels.get(int(row["cluster"]), ""),
-            "url": str(row.get("Url", "") or ""),
-            "doi": str(row.get("DOI", "") or ""),
-            "pdf_key": str(row.get("PDF Key", "") or ""),
+            "item_type": item_type,
+            "is_paper": bool(is_paper),
+            "venue_quality": float(venue_quality),
+            "x": float(x),
+            "y": float(y),
+            "cluster": int(cluster),
+            "cluster_label": cluster_labels.get(int(cluster), ""),
+            "url": url,
+            "doi": doi,
+            "pdf_key": pdf_key,
             "abstract": abstract[:500],  # 길이 제한
             "tags": manual_tags,
-            "has_notes": bool(pd.notna(row.get("Notes")) and len(str(row.get("Notes", ""))) > 50),
-            "notes_html": str(row.get("Notes", ""))[:5000] if pd.notna(row.get("Notes")) else "",  # HTML 보존
-            "notes": extract_text_from_html(row.get("Notes", ""))[:2000] if pd.notna(row.get("Notes")) else "",
+            "has_notes": len(notes) > 50,
+            "notes_html": notes[:5000],  # HTML 보존
+            "notes": reused[idx]["notes"] if idx in reused else extract_text_from_html(notes)[:2000],
+            "version": version,
         }
 
         # 기존 citation 데이터 복원
-        doi = rec.get("doi", "")
         if doi and doi in existing_citation_data:
             cdata = existing_citation_data[doi]
             rec["citation_count"] = cdata["citation_count"]
@@ -1057,15 +1501,17 @@ def main():
             rec["references"] = cdata["references"]
             rec["citations"] = cdata["citations"]
 
-        # 임베딩 추가 (시맨틱 검색용)
-        if use_multi_vector:
-            # multi_vector_embeddings는 list of list of lists (이미 tolist() 됨)
-            rec["embeddings"] = multi_vector_embeddings[idx]
-        else:
-            rec["embedding"] = embeddings[idx].tolist()
+        # 임베딩 추가 (시맨틱 검색용, 사이드카 모드면 papers.embeddings.<id>.npy로)
+        if args.embedding_sidecar is None:
+            if use_multi_vector:
+                rec["embeddings"] = encode_vectors(multi_vector_embeddings[idx], args.embedding_format)
+            else:
+                rec["embedding"] = encode_vectors(paper_vectors[idx], args.embedding_format)
 
         records.append(rec)
 
+    sidecar_id = new_sidecar_id() if args.embedding_sidecar else None
+
     # 데이터 소스 업데이트 시간
     if args.source == "api":
         data_updated = datetime.now().strftime("%Y-%m-%d %H:%M")
@@ -1097,28 +1543,48 @@ def main():
         "papers": records,
         "cluster_centroids": cluster_centroids,
         "cluster_labels": cluster_labels,
+        "cluster_hierarchy": cluster_hierarchy,
         "citation_links": citation_links,  # S2 ID 기반 재생성
         "reference_cache": existing_reference_cache,  # S2 외부 참조 캐시 보존
         "meta": {
             "source": args.source,
+            "embedding": args.embedding,
+            "embedding_format": args.embedding_format,
+            "embedding_store": "sidecar" if args.embedding_sidecar else "inline",
+            "embedding_sidecar_id": sidecar_id,
+            "note_extractor": NOTE_EXTRACTOR_VERSION,
+            **embedder_meta(args.embedding),
             "data_updated": data_updated,
             "map_built": datetime.now().strftime("%Y-%m-%d %H:%M"),
             "total_papers": sum(1 for r in records if r['is_paper']),
             "total_apps": sum(1 for r in records if not r['is_paper']),
             "clusters": n_clusters,
+            "map_build_id": map_build_id,
             "zotero_library_id": os.environ.get("ZOTERO_LIBRARY_ID", ""),
             "zotero_library_type": os.environ.get("ZOTERO_LIBRARY_TYPE", "user")
         }
     }
 
-    with open(args.output, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    # 사이드카를 먼저 쓰고 papers.json 교체를 커밋 지점으로 (papers.json이 가리키는 id의 파일만 읽힘)
+    if args.embedding_sidecar:
+        sidecar = write_sidecar(args.output, multi_vector_embeddings if use_multi_vector else paper_vectors,
+                                args.embedding_sidecar, sidecar_id)
+
+    write_papers_json(args.output, output_data)
+    remove_stale_sidecars(args.output, sidecar_id)
+
+    if knn:
+        save_knn_graph(knn_path(args.output), knn[0], knn[1], keys)
 
     print(f"\n✅ Done! Generated {args.output} with {len(records)} items")
     print(f"   - Papers: {sum(1 for r in records if r['is_paper'])}")
     print(f"   - Apps/Services: {sum(1 for r in records if not r['is_paper'])}")
     print(f"   - Clusters: {n_clusters}")
     print(f"   - Auto-tagged reviews: {review_count}")
+    if knn:
+        print(f"   - kNN graph: {knn_path(args.output)}")
+    if args.embedding_sidecar:
+        print(f"   - Embeddings: {sidecar[0]} ({args.embedding_sidecar}, normalised), {sidecar[1]}, {sidecar[2]}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Stable cluster IDs across rebuilds
+- Matches this build's KMeans clusters to the previous papers.json clusters by
+  member overlap (zotero_key), using Hungarian assignment
+- A match is kept when the Jaccard overlap reaches the threshold: the cluster
+  reuses the old ID and label, so `cluster:` tags only change for papers that moved
+- Unmatched clusters get the lowest free IDs
+"""
+
+import json
+from collections import Counter
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+
+def load_previous_clusters(path: str) -> tuple:
+    """({zotero_key: cluster}, {cluster: label}) from the previous papers.json"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        return {}, {}
+    if not isinstance(previous, dict):
+        return {}, {}
+    members = {
+        p["zotero_key"]: int(p["cluster"]) for p in previous.get("papers", [])
+        if p.get("zotero_key") and p.get("cluster") is not None
+    }
+    labels = {int(c): label for c, label in previous.get("cluster_labels", {}).items()}
+    return members, labels
+
+
+def align_clusters(labels: list, keys: list, previous: dict, n_clusters: int, min_jaccard: float = 0.5) -> tuple:
+    """Map this build's cluster labels to stable IDs
+
+    labels[i] / keys[i]: KMeans label (0..k-1) and zotero_key of paper i.
+    previous: zotero_key -> cluster ID of the previous build.
+    Returns ({new label: stable ID}, {new label: matched previous ID}).
+    """
+    new_ids = list(range(n_clusters))
+    old_ids = sorted(set(previous.values()))
+    if not old_ids:
+        return {c: c for c in new_ids}, {}
+
+    new_pos = {c: i for i, c in enumerate(new_ids)}
+    old_pos = {c: j for j, c in enumerate(old_ids)}
+    overlap = np.zeros((len(new_ids), len(old_ids)))
+    for key, label in zip(keys, labels):
+        if key in previous:
+            overlap[new_pos[label], old_pos[previous[key]]] += 1
+
+    new_size, old_size = Counter(labels), Counter(previous.values())
+    matched = {}
+    for i, j in zip(*linear_sum_assignment(-overlap)):
+        new, old = new_ids[i], old_ids[j]
+        union = new_size[new] + old_size[old] - overlap[i, j]
+        if union and overlap[i, j] / union >= min_jaccard:
+            matched[new] = old
+
+    used = set(matched.values())
+    free = (c for c in range(len(new_ids) + len(used)) if c not in used)
+    mapping = {c: matched[c] if c in matched else next(free) for c in new_ids}
+    return mapping, matched
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Multi-resolution cluster hierarchy for map zoom levels
+- Ward tree over the KMeans centroids (one per flat cluster), built once per build
+- Stored as a parent array: nodes 0..n-1 are the flat clusters (leaves),
+  n..2n-2 are merges in Ward order, the root has parent -1
+- Levels cut the tree at k = n, n/2, n/4, ... >= 2 groups; build_map adds
+  TF-IDF labels and 2D centroids per level for the frontend
+"""
+
+import numpy as np
+from scipy.cluster.hierarchy import linkage
+
+MIN_GROUPS = 2
+
+
+def build_hierarchy(centers: np.ndarray, leaves: list) -> dict:
+    """Parent-array Ward tree over cluster centres
+
+    leaves[i] is the cluster id of leaf node i (row i of centers).
+    Returns {"leaves", "parent", "levels": [{"k", "nodes"}]} (fine -> coarse),
+    or None with fewer than three clusters.
+    """
+    n = len(centers)
+    if n <= MIN_GROUPS:
+        return None
+
+    merges = linkage(np.asarray(centers, dtype=np.float64), method="ward")[:, :2].astype(int)
+    parent = [-1] * (2 * n - 1)
+    for step, (a, b) in enumerate(merges):
+        parent[a] = parent[b] = n + step
+
+    ks = []
+    k = n
+    while k >= MIN_GROUPS:
+        if k not in ks:
+            ks.append(k)
+        k //= 2
+
+    # k개 그룹 = 처음 n-k번 병합을 적용한 뒤 남은 노드
+    levels = []
+    active = set(range(n))
+    for step, (a, b) in enumerate(merges, 1):
+        active -= {a, b}
+        active.add(n + step - 1)
+        if n - step in ks:
+            levels.append({"k": n - step, "nodes": sorted(active)})
+    levels.insert(0, {"k": n, "nodes": list(range(n))})
+
+    return {"leaves": [int(c) for c in leaves], "parent": parent, "levels": levels}
+
+
+def leaf_to_node(hierarchy: dict, nodes: list) -> dict:
+    """cluster id -> node of the given level that contains it"""
+    parent, level = hierarchy["parent"], set(nodes)
+    mapping = {}
+    for leaf, cluster in enumerate(hierarchy["leaves"]):
+        node = leaf
+        while node not in level:
+            node = parent[node]
+        mapping[cluster] = node
+    return mapping
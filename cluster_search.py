@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Fast auto-k search for build_map clustering
+- MiniBatchKMeans per candidate k (full KMeans only for the final fit)
+- Silhouette on a fixed random sample instead of all O(n²) pairs
+- Candidate k values evaluated in parallel across cores
+- Optional warm start: search a window around the previous build's k first
+- `python cluster_search.py bench` times old vs new search on synthetic blobs
+"""
+
+import os
+import time
+import argparse
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+
+WARM_START_WINDOW = 2
+
+
+def _score_k(X: np.ndarray, k: int, sample_size: int, random_state: int) -> tuple:
+    labels = MiniBatchKMeans(n_clusters=k, random_state=random_state, n_init=3,
+                             batch_size=2048).fit_predict(X)
+    if len(np.unique(labels)) < 2:
+        return k, -1.0
+    size = sample_size if sample_size and sample_size < len(X) else None
+    return k, float(silhouette_score(X, labels, sample_size=size, random_state=random_state))
+
+
+def find_best_k(X: np.ndarray, k_range, sample_size: int = 5000, n_jobs: int = 0,
+                previous_k: int = None, random_state: int = 42, default_k: int = 10) -> tuple:
+    """Pick k with the best (sampled) silhouette
+
+    With previous_k inside k_range only a window around it is scored; the
+    window grows toward whichever edge wins until the best k is interior.
+    Returns (best_k, {k: score}).
+    """
+    k_values = list(k_range)
+    if not k_values:
+        return default_k, {}
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    scores = {}
+
+    def evaluate(ks):
+        ks = [k for k in ks if k not in scores]
+        if ks:
+            with Parallel(n_jobs=min(n_jobs, len(ks)), prefer="processes") as parallel:
+                for k, score in parallel(delayed(_score_k)(X, k, sample_size, random_state) for k in ks):
+                    scores[k] = score
+                    print(f"  k={k}: silhouette={score:.3f}")
+
+    if previous_k in k_values:
+        pos = k_values.index(previous_k)
+        lo, hi = max(0, pos - WARM_START_WINDOW), min(len(k_values), pos + WARM_START_WINDOW + 1)
+        print(f"  Warm start around previous k={previous_k}")
+        evaluate(k_values[lo:hi])
+        while True:
+            best = max(scores, key=scores.get)
+            pos = k_values.index(best)
+            if pos == lo and lo > 0:
+                lo = max(0, lo - WARM_START_WINDOW)
+            elif pos == hi - 1 and hi < len(k_values):
+                hi = min(len(k_values), hi + WARM_START_WINDOW)
+            else:
+                break
+            evaluate(k_values[lo:hi])
+    else:
+        evaluate(k_values)
+
+    best_k = max(scores, key=scores.get)
+    return best_k, scores
+
+
+def exhaustive_best_k(X: np.ndarray, k_range, random_state: int = 42) -> tuple:
+    """Previous search: full KMeans(n_init=10) + exact silhouette for every k"""
+    scores = {}
+    for k in k_range:
+        labels = KMeans(n_clusters=k, random_state=random_state, n_init=10).fit_predict(X)
+        scores[k] = float(silhouette_score(X, labels))
+    return max(scores, key=scores.get), scores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Auto-k cluster search benchmark")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("--n", type=int, default=20000, help="Number of synthetic papers")
+    parser.add_argument("--dim", type=int, default=387, help="Feature dimension (384 embedding + 3 meta)")
+    parser.add_argument("--true-k", type=int, default=12)
+    parser.add_argument("--sample-size", type=int, default=5000)
+    parser.add_argument("--exhaustive", action="store_true", help="Also time the previous exhaustive search")
+    args = parser.parse_args()
+
+    from sklearn.datasets import make_blobs
+    X, _ = make_blobs(n_samples=args.n, n_features=args.dim, centers=args.true_k,
+                      cluster_std=8.0, random_state=0)
+    k_range = range(5, min(20, args.n // 10))
+
+    start = time.perf_counter()
+    best_k, _ = find_best_k(X, k_range, args.sample_size)
+    print(f"sampled/parallel: k={best_k} in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    warm_k, _ = find_best_k(X, k_range, args.sample_size, previous_k=best_k)
+    print(f"warm start:       k={warm_k} in {time.perf_counter() - start:.1f}s")
+
+    if args.exhaustive:
+        start = time.perf_counter()
+        exact_k, _ = exhaustive_best_k(X, k_range)
+        print(f"exhaustive:       k={exact_k} in {time.perf_counter() - start:.1f}s")
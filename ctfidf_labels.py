@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Class-based TF-IDF cluster labels (sparse, streaming)
+- Per-paper token counts are streamed into a sparse cluster × term matrix,
+  flushed every few thousand papers, so memory does not grow with note length
+- TF-IDF over cluster rows, the 1/df² distinctiveness penalty and the top-3
+  keyword pick all stay sparse (no toarray)
+- Coarser groupings (hierarchy levels) reuse the leaf counts: level = A @ leaves
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+MAX_FEATURES = 500
+TOP_KEYWORDS = 3
+FLUSH_EVERY = 2000  # 논문 n개마다 COO 버퍼를 CSR로 합침
+
+# 다국어 불용어 (영어 + 한국어)
+MULTILINGUAL_STOP_WORDS = [
+    # English
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+    'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been', 'be', 'have', 'has', 'had',
+    'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must',
+    'this', 'that', 'these', 'those', 'it', 'its', 'we', 'our', 'they', 'their', 'them',
+    'can', 'also', 'more', 'how', 'what', 'which', 'who', 'when', 'where', 'why',
+    'using', 'use', 'used', 'based', 'through', 'between', 'into', 'such', 'than',
+    'study', 'research', 'paper', 'results', 'findings', 'analysis', 'data', 'method',
+    # Korean
+    '및', '등', '를', '을', '이', '가', '은', '는', '에', '의', '로', '으로', '와', '과',
+    '하는', '있는', '되는', '한', '된', '수', '것', '대한', '통해', '위해', '대해',
+    '연구', '기술', '위한', '사용', '제안', '보여', '제시', '기반', '활용', '가능',
+    '사용자', '논문', '시스템', '인터페이스', '사람', '정보', '방법', '결과',
+    '모델', '분석', '설계', '개발', '평가', '실험', '참여자', '프로세스',
+]
+
+HANGUL_RE = re.compile(r'[가-힣]')
+# 조사 패턴 (단어 끝에 붙는 것들)
+KOREAN_PARTICLE_RE = re.compile(
+    r'(을|를|이|가|은|는|에|의|로|으로|와|과|도|만|까지|부터|에서|으로서|이라|라|란|라는|이라는)$'
+)
+
+
+@lru_cache(maxsize=200_000)
+def _strip_word(word: str) -> str:
+    # 한글 단어에서 조사 제거, 너무 짧아지면 원본 유지
+    if not HANGUL_RE.search(word):
+        return word
+    cleaned = KOREAN_PARTICLE_RE.sub('', word)
+    return cleaned if len(cleaned) >= 2 else word
+
+
+def strip_korean_particles(text: str) -> str:
+    """한국어 조사 제거 전처리"""
+    return ' '.join(_strip_word(word) for word in text.split())
+
+
+_analyze = CountVectorizer(
+    stop_words=MULTILINGUAL_STOP_WORDS,
+    ngram_range=(1, 2),
+    token_pattern=r'(?u)\b[가-힣a-zA-Z]{2,}\b'  # 한글/영어 2글자 이상
+).build_analyzer()
+
+
+def cluster_term_counts(paper_texts, groups, group_ids) -> tuple:
+    """Stream paper texts into a sparse (len(group_ids), n_terms) count matrix
+
+    paper_texts / groups are parallel iterables (text and group id per paper);
+    paper_texts may be a generator. Returns (csr counts, term list).
+    """
+    row_of = {g: i for i, g in enumerate(group_ids)}
+    vocab = {}
+    counts = sparse.csr_matrix((len(row_of), 0), dtype=np.int64)
+    rows, cols, vals = [], [], []
+
+    def flush():
+        nonlocal counts
+        shape = (len(row_of), len(vocab))
+        counts.resize(shape)
+        counts = counts + sparse.coo_matrix((vals, (rows, cols)), shape=shape, dtype=np.int64).tocsr()
+        rows.clear()
+        cols.clear()
+        vals.clear()
+
+    for n, (text, g) in enumerate(zip(paper_texts, groups), 1):
+        row = row_of[g]
+        for term, c in Counter(_analyze(strip_korean_particles(str(text)))).items():
+            rows.append(row)
+            cols.append(vocab.setdefault(term, len(vocab)))
+            vals.append(c)
+        if n % FLUSH_EVERY == 0:
+            flush()
+    flush()
+
+    terms = [None] * len(vocab)
+    for term, j in vocab.items():
+        terms[j] = term
+    return counts, terms
+
+
+def ctfidf_labels(counts, terms: list, group_ids, max_features: int = MAX_FEATURES) -> dict:
+    """Top TF-IDF keywords per group row, penalising terms shared across groups
+
+    Matches TfidfVectorizer(max_features, smooth idf, l2) fitted on one
+    document per group, followed by a 1/df² distinctiveness weight.
+    """
+    group_ids = list(group_ids)
+    counts = sparse.csr_matrix(counts, dtype=np.float64)
+
+    # 전체 빈도 상위 max_features 단어만
+    totals = np.asarray(counts.sum(axis=0)).ravel()
+    keep = np.sort(np.argsort(-totals, kind="stable")[:max_features])
+    counts = counts[:, keep]
+    if not counts.shape[1]:
+        return {g: f"Cluster {g}" for g in group_ids}
+
+    # 각 단어가 몇 개의 클러스터에서 등장하는지
+    term_cluster_count = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + len(group_ids)) / (1 + term_cluster_count)) + 1
+    tfidf = normalize(counts @ sparse.diags(idf), norm="l2")
+
+    # 여러 클러스터에 등장하는 단어는 점수 강하게 낮춤 (1/n² 패널티)
+    distinctiveness = 1.0 / np.maximum(term_cluster_count, 1) ** 2
+    adjusted = sparse.csr_matrix(tfidf @ sparse.diags(distinctiveness))
+
+    labels = {}
+    for i, g in enumerate(group_ids):
+        start, end = adjusted.indptr[i], adjusted.indptr[i + 1]
+        data, cols = adjusted.data[start:end], adjusted.indices[start:end]
+        top = np.argsort(-data, kind="stable")[:TOP_KEYWORDS]
+        keywords = [terms[keep[cols[j]]] for j in top if data[j] > 0]
+        labels[g] = ", ".join(keywords) if keywords else f"Cluster {g}"
+    return labels
+
+
+def group_counts(counts, leaf_ids: list, node_of: dict, nodes: list):
+    """Aggregate leaf-cluster count rows into coarser groups (rows follow `nodes`)"""
+    col = {node: j for j, node in enumerate(nodes)}
+    aggregate = sparse.csr_matrix(
+        (np.ones(len(leaf_ids)), ([col[node_of[c]] for c in leaf_ids], range(len(leaf_ids)))),
+        shape=(len(nodes), len(leaf_ids)),
+    )
+    return aggregate @ counts
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Sentence embedding backends
+- torch: full fp32 PyTorch SentenceTransformer (default)
+- onnx-int8: ONNX export of the same model, dynamically quantized to int8
+  (needs `pip install optimum[onnxruntime]`)
+- Export + parity check CLI against the PyTorch embeddings
+"""
+
+import os
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+BACKENDS = ["torch", "onnx-int8"]
+DEFAULT_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# export_dynamic_quantized_onnx_model이 만드는 파일 이름 (onnx/model_qint8_<config>.onnx)
+QUANTIZATION_CONFIG = os.environ.get("EMBED_ONNX_QCONFIG", "avx2")
+ONNX_INT8_FILE = f"onnx/model_qint8_{QUANTIZATION_CONFIG}.onnx"
+
+
+def default_model_dir(model_name: str) -> str:
+    """Local directory holding the exported ONNX copy of a model"""
+    return str(Path(__file__).parent / "models" / f"{model_name.split('/')[-1]}-onnx")
+
+
+def cache_key(model_name: str, backend: str) -> str:
+    """Embedding cache key: quantized vectors must not mix with fp32 ones"""
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def load_sentence_model(model_name: str, backend: str = "torch", model_dir: str = None, threads: int = 0):
+    """Load a SentenceTransformer for the given backend
+
+    threads > 0 caps onnxruntime's intra-op pool (it ignores OMP_NUM_THREADS and
+    otherwise starts one thread per core in every process).
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "onnx-int8":
+        model_dir = model_dir or default_model_dir(model_name)
+        if not (Path(model_dir) / ONNX_INT8_FILE).exists():
+            raise FileNotFoundError(
+                f"{model_dir}/{ONNX_INT8_FILE} not found. "
+                f"Run: python embedding_backend.py export --model {model_name}"
+            )
+        model_kwargs = {"file_name": ONNX_INT8_FILE}
+        if threads:
+            import onnxruntime as ort
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+            model_kwargs["session_options"] = options
+        return SentenceTransformer(model_dir, backend="onnx", model_kwargs=model_kwargs)
+    raise ValueError(f"Unknown embedding backend: {backend} (choose from {', '.join(BACKENDS)})")
+
+
+def export_onnx_int8(model_name: str, model_dir: str = None) -> str:
+    """Export model to ONNX and write a dynamically quantized int8 copy into model_dir"""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    model_dir = model_dir or default_model_dir(model_name)
+    print(f"Exporting {model_name} to ONNX: {model_dir}")
+    model = SentenceTransformer(model_name, backend="onnx")
+    model.save(model_dir)
+
+    print(f"Quantizing (dynamic int8, {QUANTIZATION_CONFIG})...")
+    export_dynamic_quantized_onnx_model(model, QUANTIZATION_CONFIG, model_dir)
+    return model_dir
+
+
+def parity_check(model_name: str, texts: list, model_dir: str = None, k: int = 5) -> dict:
+    """Compare onnx-int8 embeddings against PyTorch fp32 on the same texts
+
+    Reports per-text cosine between the two backends and how many of each
+    text's top-k nearest neighbours are preserved.
+    """
+    ref = load_sentence_model(model_name, "torch").encode(texts, convert_to_numpy=True)
+    quant = load_sentence_model(model_name, "onnx-int8", model_dir).encode(texts, convert_to_numpy=True)
+
+    ref = ref / np.linalg.norm(ref, axis=1, keepdims=True)
+    quant = quant / np.linalg.norm(quant, axis=1, keepdims=True)
+    cosines = np.sum(ref * quant, axis=1)
+
+    k = min(k, len(texts) - 1)
+    overlap = 1.0
+    if k > 0:
+        ref_sims = ref @ ref.T
+        quant_sims = quant @ quant.T
+        np.fill_diagonal(ref_sims, -np.inf)
+        np.fill_diagonal(quant_sims, -np.inf)
+        ref_nn = np.argsort(-ref_sims, axis=1)[:, :k]
+        quant_nn = np.argsort(-quant_sims, axis=1)[:, :k]
+        overlap = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_nn, quant_nn)]))
+
+    return {
+        "texts": len(texts),
+        "mean_cosine": float(np.mean(cosines)),
+        "min_cosine": float(np.min(cosines)),
+        f"neighbor_overlap@{k}": overlap,
+    }
+
+
+def sample_texts(papers_path: str, n: int) -> list:
+    """Titles and abstracts from papers.json for the parity check"""
+    with open(papers_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    papers = data.get("papers", data) if isinstance(data, dict) else data
+
+    texts = []
+    for p in papers:
+        for field in ("title", "abstract"):
+            if p.get(field):
+                texts.append(p[field])
+    return texts[:n]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ONNX int8 embedding backend tools")
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--model-dir", default=None, help="Default: models/<model>-onnx")
+    parser.add_argument("--papers", default="papers.json", help="Texts for the parity check")
+    parser.add_argument("--n", type=int, default=300, help="Number of texts for the parity check")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx_int8(args.model, args.model_dir)
+
+    texts = sample_texts(args.papers, args.n) if Path(args.papers).exists() else []
+    if len(texts) < 2:
+        print(f"Not enough texts in {args.papers} for a parity check")
+    else:
+        report = parity_check(args.model, texts, args.model_dir)
+        print(json.dumps(report, indent=2))
+        if report["min_cosine"] < 0.98:
+            print("⚠️  onnx-int8 diverges from PyTorch on some texts; keep backend=torch for builds")
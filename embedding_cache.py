@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Persistent embedding cache (SQLite)
+- (model name, SHA-256 of exact text) -> vector
+- Shared by every build_map embedding path
+- Size and age based eviction
+"""
+
+import hashlib
+import sqlite3
+import time
+
+import numpy as np
+
+# SQLite bound-parameter limit safe for all versions
+_QUERY_CHUNK = 500
+
+
+def text_hash(text: str) -> str:
+    """Content address for a text chunk"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk embedding store keyed by (model, text hash)"""
+
+    def __init__(self, path: str, max_mb: float = 1024, max_age_days: float = 90):
+        self.path = str(path)
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else 0
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dtype TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self.conn.commit()
+
+    def get_many(self, model: str, texts: list) -> list:
+        """Look up vectors; returns a list aligned with texts (None for misses)"""
+        hashes = [text_hash(t) for t in texts]
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+
+        for i in range(0, len(unique), _QUERY_CHUNK):
+            chunk = unique[i:i + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT text_hash, dtype, vector FROM embeddings "
+                f"WHERE model = ? AND text_hash IN ({placeholders})",
+                [model, *chunk]
+            ).fetchall()
+            for h, dtype, blob in rows:
+                found[h] = np.frombuffer(blob, dtype=dtype)
+
+        # 사용 시각 갱신 (LRU 기반 eviction용)
+        if found:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(now, model, h) for h in found]
+            )
+            self.conn.commit()
+
+        result = [found.get(h) for h in hashes]
+        n_hits = sum(1 for v in result if v is not None)
+        self.hits += n_hits
+        self.misses += len(result) - n_hits
+        return result
+
+    def put_many(self, model: str, texts: list, vectors) -> None:
+        """Store vectors for texts (same order)"""
+        now = time.time()
+        rows = []
+        for text, vec in zip(texts, vectors):
+            vec = np.ascontiguousarray(vec)
+            rows.append((model, text_hash(text), vec.dtype.str, int(vec.shape[0]), vec.tobytes(), now, now))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings "
+            "(model, text_hash, dtype, dim, vector, created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        self.conn.commit()
+
+    def evict(self) -> int:
+        """Drop entries unused for max_age_days, then least-recently-used ones above max size"""
+        removed = 0
+
+        if self.max_age_days:
+            cutoff = time.time() - self.max_age_days * 86400
+            cur = self.conn.execute("DELETE FROM embeddings WHERE last_used < ?", (cutoff,))
+            removed += cur.rowcount
+
+        if self.max_bytes:
+            total = self.conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                rows = self.conn.execute(
+                    "SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY last_used ASC"
+                )
+                doomed = []
+                for rowid, size in rows:
+                    if excess <= 0:
+                        break
+                    doomed.append((rowid,))
+                    excess -= size
+                self.conn.executemany("DELETE FROM embeddings WHERE rowid = ?", doomed)
+                removed += len(doomed)
+
+        self.conn.commit()
+        return removed
+
+    def stats(self) -> dict:
+        """Entry count, stored bytes and hit/miss counters"""
+        count, size = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+        return {"entries": count, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def cached_encode(cache, model_key: str, texts: list, encode_fn, verbose: bool = True) -> np.ndarray:
+    """Encode texts through the cache: look up first, encode only misses, store them
+
+    encode_fn(list[str]) -> (n, dim) array. With cache=None this is just encode_fn(texts).
+    """
+    if cache is None or not texts:
+        return encode_fn(texts)
+
+    vectors = cache.get_many(model_key, texts)
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if verbose:
+        print(f"  Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+
+    if missing:
+        missing_texts = [texts[i] for i in missing]
+        new_vectors = np.asarray(encode_fn(missing_texts))
+        cache.put_many(model_key, missing_texts, new_vectors)
+        for j, i in enumerate(missing):
+            vectors[i] = new_vectors[j]
+
+    return np.vstack(vectors)
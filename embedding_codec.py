@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Compact embedding storage for papers.json
+- json: plain float lists (default, backwards compatible)
+- float16: {"dtype": "float16", "shape": [...], "data": base64}
+- int8: per-vector scaled, {"dtype": "int8", "shape": [...], "scale": base64 float32, "data": base64}
+- `python embedding_codec.py recall` compares search results of each format against fp32
+"""
+
+import json
+import base64
+import argparse
+
+import numpy as np
+
+FORMATS = ["json", "float16", "int8"]
+
+
+def _b64(arr: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(arr).tobytes()).decode("ascii")
+
+
+def _unb64(data: str, dtype) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=dtype)
+
+
+def encode_vectors(vectors, fmt: str = "json"):
+    """Serialize one vector (dim,) or a vector list (n, dim) for JSON output"""
+    arr = np.asarray(vectors, dtype=np.float32)
+    if fmt == "json":
+        return arr.tolist()
+    if fmt == "float16":
+        return {"dtype": "float16", "shape": list(arr.shape), "data": _b64(arr.astype("<f2"))}
+    if fmt == "int8":
+        # 벡터별 스케일: max|x| -> 127
+        scale = np.abs(arr).max(axis=-1, keepdims=True) / 127.0
+        scale[scale == 0] = 1.0
+        quantized = np.clip(np.round(arr / scale), -127, 127).astype(np.int8)
+        return {"dtype": "int8", "shape": list(arr.shape),
+                "scale": _b64(scale.astype("<f4").ravel()), "data": _b64(quantized)}
+    raise ValueError(f"Unknown embedding format: {fmt} (choose from {', '.join(FORMATS)})")
+
+
+def decode_vectors(value) -> np.ndarray:
+    """Inverse of encode_vectors; accepts any stored format, returns float32"""
+    if not isinstance(value, dict):
+        return np.asarray(value, dtype=np.float32)
+
+    shape = tuple(value["shape"])
+    if value["dtype"] == "float16":
+        return _unb64(value["data"], "<f2").astype(np.float32).reshape(shape)
+    if value["dtype"] == "int8":
+        quantized = _unb64(value["data"], np.int8).astype(np.float32).reshape(shape)
+        scale = _unb64(value["scale"], "<f4").reshape(shape[:-1] + (1,))
+        return quantized * scale
+    raise ValueError(f"Unknown stored embedding dtype: {value['dtype']}")
+
+
+def _hybrid_scores(query: np.ndarray, papers: list, alpha: float = 0.6, top_k_mean: int = 3) -> np.ndarray:
+    scores = np.empty(len(papers))
+    for i, vecs in enumerate(papers):
+        sims = (vecs / np.linalg.norm(vecs, axis=1, keepdims=True)) @ query
+        top = np.sort(sims)[::-1][:top_k_mean]
+        scores[i] = alpha * sims.max() + (1 - alpha) * top.mean()
+    return scores
+
+
+def recall_report(papers_path: str, n_queries: int = 200, k: int = 10, seed: int = 42) -> dict:
+    """Recall@k of each storage format vs fp32 on this library
+
+    Queries are chunk vectors sampled from the library itself, so no model is needed.
+    """
+    with open(papers_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    papers = data.get("papers", data) if isinstance(data, dict) else data
+
+    if isinstance(data, dict) and data.get("meta", {}).get("embedding_store") == "sidecar":
+        from embedding_store import load_sidecar, paper_rows
+        vectors, offsets, _ = load_sidecar(papers_path, data["meta"].get("embedding_sidecar_id"), len(papers))
+        if vectors is None:
+            raise FileNotFoundError(f"Embedding sidecar of {papers_path} missing or out of date")
+        reference = [paper_rows(vectors, offsets, i) for i in range(len(offsets) - 1) if offsets[i + 1] > offsets[i]]
+    else:
+        field = "embeddings" if any(p.get("embeddings") for p in papers) else "embedding"
+        reference = [np.atleast_2d(decode_vectors(p[field])) for p in papers if p.get(field)]
+    all_chunks = np.vstack(reference)
+
+    rng = np.random.default_rng(seed)
+    queries = all_chunks[rng.choice(len(all_chunks), size=min(n_queries, len(all_chunks)), replace=False)]
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    k = min(k, len(reference))
+
+    exact = [np.argsort(-_hybrid_scores(q, reference))[:k] for q in queries]
+    report = {"papers": len(reference), "chunks": len(all_chunks), "queries": len(queries), "k": k}
+    ref_bytes = len(json.dumps([v.tolist() for v in reference]))
+
+    for fmt in FORMATS[1:]:
+        stored = [encode_vectors(v, fmt) for v in reference]
+        restored = [decode_vectors(v) for v in stored]
+        recalls = []
+        for q, top_exact in zip(queries, exact):
+            top = np.argsort(-_hybrid_scores(q, restored))[:k]
+            recalls.append(len(set(top) & set(top_exact)) / k)
+        report[fmt] = {
+            f"recall@{k}": float(np.mean(recalls)),
+            "min_recall": float(np.min(recalls)),
+            "size_ratio": len(json.dumps(stored)) / ref_bytes,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding storage format tools")
+    parser.add_argument("command", choices=["recall"])
+    parser.add_argument("--papers", default="papers.json")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    print(json.dumps(recall_report(args.papers, args.queries, args.k), indent=2))
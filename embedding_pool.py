@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Multi-process CPU embedding engine
+- One SentenceTransformer per worker process
+- Intra-op threads pinned per worker (cores / workers); the thread env vars are
+  set before the workers spawn, so they apply before any numeric import
+- Length-sorted shards spread across workers, results returned in input order
+"""
+
+import os
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# 워커 프로세스 전역 모델 (initializer에서 로드)
+_worker_model = None
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+@contextmanager
+def _worker_env(threads: int):
+    """Environment inherited by workers spawned inside the block
+
+    spawn re-imports __main__ (numpy, torch, ...) before the initializer runs,
+    so thread counts set only in the initializer come too late.
+    """
+    overrides = {var: str(threads) for var in THREAD_ENV_VARS}
+    overrides["CUDA_VISIBLE_DEVICES"] = ""
+    saved = {var: os.environ.get(var) for var in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _worker_ready(_):
+    return os.getpid()
+
+
+def _init_worker(model_name: str, threads: int, backend: str, model_dir: str):
+    """Worker initializer: pin threads, load the model once"""
+    global _worker_model
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    from embedding_backend import load_sentence_model
+    _worker_model = load_sentence_model(model_name, backend, model_dir, threads)
+
+
+def _encode_shard(texts: list, batch_size: int) -> np.ndarray:
+    return _worker_model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+
+
+class EmbeddingPool:
+    """Process pool that shards texts across workers"""
+
+    def __init__(self, model_name: str, workers: int, threads_per_worker: int = 0,
+                 backend: str = "torch", model_dir: str = None):
+        self.model_name = model_name
+        self.workers = workers
+        self.threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        print(f"Starting {workers} embedding workers ({self.threads} threads each): {model_name} [{backend}]")
+        with _worker_env(self.threads):
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, self.threads, backend, model_dir),
+            )
+            # 환경 변수가 적용된 상태에서 워커를 모두 띄움 (spawn은 첫 submit 때 일어남)
+            list(self.executor.map(_worker_ready, range(workers)))
+
+    def encode(self, texts: list, batch_size: int = 64, show_progress: bool = True) -> np.ndarray:
+        """Encode texts across workers; returns (len(texts), dim) in input order"""
+        total = len(texts)
+        order = sorted(range(total), key=lambda i: len(texts[i]), reverse=True)
+
+        # 비슷한 길이끼리 묶인 shard를 여러 개 만들어 워커 간 부하 균형
+        shard_size = batch_size * 4
+        shards = [order[i:i + shard_size] for i in range(0, total, shard_size)]
+        futures = {
+            self.executor.submit(_encode_shard, [texts[i] for i in shard], batch_size): shard
+            for shard in shards
+        }
+
+        vectors = None
+        done = 0
+        for n, future in enumerate(as_completed(futures), 1):
+            shard = futures[future]
+            shard_embs = future.result()
+            if vectors is None:
+                vectors = np.empty((total, shard_embs.shape[1]), dtype=shard_embs.dtype)
+            vectors[shard] = shard_embs
+
+            done += len(shard)
+            if show_progress and (n % 5 == 0 or done == total):
+                print(f"  Processed {done}/{total} chunks")
+
+        return vectors
+
+    def close(self):
+        self.executor.shutdown()
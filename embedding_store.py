@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Binary embedding sidecar next to papers.json
+- papers.embeddings.<id>.npy: flat (n_chunks, dim) float32/float16 matrix of every
+  paper's vectors, L2-normalised, in paper id order (search uses the mmap as is)
+- papers.offsets.<id>.npy: int64 (n_papers + 1,); paper id i owns rows offsets[i]:offsets[i+1]
+- papers.norms.<id>.npy: float32 (n_chunks,) original row norms, so build_map can
+  restore the raw vectors when it reuses them
+- <id> is a per-build sidecar id recorded in papers.json meta.embedding_sidecar_id.
+  The sidecar is written before papers.json, so swapping papers.json is the commit
+  point: a reader always opens the files of the build it parsed, never a mix
+- Readers np.load(mmap_mode='r'), so processes share the pages through the page cache
+"""
+
+import os
+import glob
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from hybrid_search import normalize_rows
+
+DTYPES = ["float32", "float16"]
+
+
+def new_sidecar_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def sidecar_paths(output: str, sidecar_id: str = None) -> tuple:
+    """papers.json -> (papers.embeddings.<id>.npy, papers.offsets.<id>.npy, papers.norms.<id>.npy)
+
+    Without an id: the unversioned names written by older (unnormalised) builds.
+    """
+    base = Path(output).with_suffix("")
+    tag = f".{sidecar_id}" if sidecar_id else ""
+    return f"{base}.embeddings{tag}.npy", f"{base}.offsets{tag}.npy", f"{base}.norms{tag}.npy"
+
+
+def _save_atomic(path: str, array: np.ndarray):
+    # 읽는 쪽이 쓰다 만 파일을 보지 않도록 임시 파일에 쓰고 교체
+    tmp = f"{path}.tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+def write_sidecar(output: str, paper_vectors: list, dtype: str = "float32", sidecar_id: str = None) -> tuple:
+    """Write one vector (dim,) or vector list (n, dim) per paper id; returns the paths"""
+    blocks = [np.atleast_2d(np.asarray(v, dtype=np.float32)) for v in paper_vectors]
+    offsets = np.zeros(len(blocks) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in blocks])
+    matrix = np.vstack(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1).astype(np.float32)
+
+    emb_path, off_path, norm_path = sidecar_paths(output, sidecar_id)
+    _save_atomic(emb_path, normalize_rows(matrix).astype(dtype))
+    _save_atomic(off_path, offsets)
+    _save_atomic(norm_path, norms)
+    return emb_path, off_path, norm_path
+
+
+def remove_stale_sidecars(output: str, sidecar_id: str = None) -> int:
+    """Delete sidecars of other builds (call after papers.json is written)
+
+    Processes that still have an old file memory-mapped keep reading it until they reload.
+    """
+    keep = set(sidecar_paths(output, sidecar_id)) if sidecar_id else set()
+    base = str(Path(output).with_suffix(""))
+    removed = 0
+    for pattern in (f"{glob.escape(base)}.{kind}*.npy" for kind in ("embeddings", "offsets", "norms")):
+        for path in glob.glob(pattern):
+            if path not in keep and not path.endswith(".tmp.npy"):
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def load_sidecar(output: str, sidecar_id: str = None, n_papers: int = None, mmap: bool = True) -> tuple:
+    """(embeddings, offsets, norms) memory-mapped read-only, or (None, None, None) if
+    missing or inconsistent
+
+    n_papers: number of papers in the papers.json that references this sidecar.
+    norms is None for old unversioned sidecars, whose rows are not normalised.
+    """
+    emb_path, off_path, norm_path = sidecar_paths(output, sidecar_id)
+    mode = "r" if mmap else None
+    try:
+        embeddings, offsets = np.load(emb_path, mmap_mode=mode), np.load(off_path, mmap_mode=mode)
+        norms = np.load(norm_path, mmap_mode=mode) if sidecar_id else None
+    except (OSError, ValueError):
+        return None, None, None
+    if n_papers is not None and len(offsets) != n_papers + 1:
+        return None, None, None
+    if len(offsets) and offsets[-1] != len(embeddings):
+        return None, None, None
+    if norms is not None and len(norms) != len(embeddings):
+        return None, None, None
+    return embeddings, offsets, norms
+
+
+def paper_rows(embeddings: np.ndarray, offsets: np.ndarray, paper_id: int, norms: np.ndarray = None) -> np.ndarray:
+    """Vectors of one paper as float32 (n_chunks, dim); with norms, the original (unnormalised) vectors"""
+    start, end = offsets[paper_id], offsets[paper_id + 1]
+    rows = np.asarray(embeddings[start:end], dtype=np.float32)
+    return rows if norms is None else rows * np.asarray(norms[start:end])[:, None]
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI /v1/embeddings endpoint
+- Deterministic unit vectors per text (same text -> same vector)
+- Supports `dimensions`
+- Simulated latency, rate limiting (429 + Retry-After) and random 5xx failures
+
+Usage:
+    python fake_embeddings_server.py --port 8765 --latency-ms 150 --fail-rate 0.05 --rpm 600
+    python openai_embeddings.py bench --base-url http://localhost:8765/v1
+    OPENAI_BASE_URL=http://localhost:8765/v1 python build_map.py --embedding openai
+"""
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+MODEL_DIMS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+
+def fake_embedding(text: str, dim: int) -> list:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vec = np.random.default_rng(seed).standard_normal(dim)
+    return (vec / np.linalg.norm(vec)).round(6).tolist()
+
+
+class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+    config = {}
+    request_times = deque()
+    lock = threading.Lock()
+
+    def _send(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/embeddings":
+            return self._send(404, {"error": {"message": "not found"}})
+
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        inputs = payload.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+
+        rpm = self.config["rpm"]
+        if rpm:
+            with self.lock:
+                now = time.monotonic()
+                while self.request_times and now - self.request_times[0] >= 60:
+                    self.request_times.popleft()
+                if len(self.request_times) >= rpm:
+                    retry_after = 60 - (now - self.request_times[0])
+                    return self._send(429, {"error": {"message": "rate limited"}},
+                                      {"Retry-After": f"{retry_after:.1f}"})
+                self.request_times.append(now)
+
+        if random.random() < self.config["fail_rate"]:
+            return self._send(random.choice([500, 502, 503]), {"error": {"message": "simulated failure"}})
+
+        time.sleep(self.config["latency_ms"] / 1000)
+
+        model = payload.get("model", "text-embedding-3-small")
+        dim = payload.get("dimensions") or MODEL_DIMS.get(model, 1536)
+        data = [{"object": "embedding", "index": i, "embedding": fake_embedding(t, dim)}
+                for i, t in enumerate(inputs)]
+        tokens = sum(len(t) for t in inputs) // 4
+        self._send(200, {"object": "list", "data": data, "model": model,
+                         "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI embeddings server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=150, help="Per-request latency")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests that return 5xx")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429 (0 = unlimited)")
+    args = parser.parse_args()
+
+    FakeEmbeddingsHandler.config = {"latency_ms": args.latency_ms, "fail_rate": args.fail_rate, "rpm": args.rpm}
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), FakeEmbeddingsHandler)
+    print(f"Fake embeddings server on http://localhost:{args.port}/v1 "
+          f"(latency={args.latency_ms}ms, fail_rate={args.fail_rate}, rpm={args.rpm or 'unlimited'})")
+    server.serve_forever()
@@ -10,6 +10,8 @@ import time
 import requests
 from pathlib import Path
 
+from papers_io import write_papers_json
+
 # Load .env if exists
 env_path = Path(__file__).parent / ".env"
 if env_path.exists():
@@ -288,8 +290,7 @@ def main():
 
     # 저장
     output_path = Path("papers.json")
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_papers_json(output_path, data)
 
     print(f"\n✅ Updated {output_path}")
     print(f"   - Papers with citations: {found}")
@@ -12,6 +12,7 @@ async function loadData() {
       allPapers = data.papers;
       clusterCentroids = data.cluster_centroids || {};
       clusterLabels = data.cluster_labels || {};
+      clusterHierarchy = data.cluster_hierarchy || null;
       citationLinks = data.citation_links || [];
       referenceCache = data.reference_cache || {};
       dataMeta = data.meta || {};
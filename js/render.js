@@ -268,7 +268,26 @@ function render(filteredPapers) {
     bg: '#0d1117', grid: '#21262d', zero: '#30363d', text: '#8b949e'
   };
 
+  // 줌 레벨별 클러스터 라벨 (전체 보기 = 가장 굵은 레벨, 확대할수록 세분화)
+  function hierarchyAnnotations() {
+    if (!clusterHierarchy || !clusterHierarchy.levels.length) return [];
+    const levels = clusterHierarchy.levels;
+    const depth = Math.max(0, Math.floor(Math.log2(zoomScale) * 2));
+    const level = levels[Math.max(0, levels.length - 1 - depth)];
+    return level.nodes
+      .filter(node => level.centroids[node])
+      .map(node => ({
+        x: level.centroids[node].x,
+        y: level.centroids[node].y,
+        text: level === levels[0] ? getClusterLabel(clusterHierarchy.leaves[node]) : (level.labels[node] || ''),
+        showarrow: false,
+        font: { size: 12, color: colors.text },
+        opacity: 0.85
+      }));
+  }
+
   const layout = {
+    annotations: hierarchyAnnotations(),
     margin: { l: 40, r: 20, t: 20, b: 40 },
     paper_bgcolor: colors.bg,
     plot_bgcolor: colors.bg,
@@ -595,12 +614,14 @@ function render(filteredPapers) {
         return;
       }
       updateMarkerSizes();
+      if (clusterHierarchy) Plotly.relayout(plotDiv, { annotations: hierarchyAnnotations() });
     });
 
     // 더블클릭 리셋 보완
     plotDiv.on('plotly_doubleclick', function() {
       zoomScale = 1;
       updateMarkerSizes();
+      if (clusterHierarchy) Plotly.relayout(plotDiv, { annotations: hierarchyAnnotations() });
     });
   });
 }
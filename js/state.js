@@ -34,6 +34,7 @@ let allPapers = [];
 let currentFiltered = [];
 let clusterCentroids = {};
 let clusterLabels = {};
+let clusterHierarchy = null; // { leaves, parent, levels: [{ k, nodes, labels, centroids }] } fine -> coarse
 let citationLinks = [];
 let referenceCache = {};
 let dataMeta = {};
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Approximate kNN graphs (pynndescent, cosine)
+- build_map builds one on the unit-normalised paper embeddings only (content
+  similarity), saved next to papers.json as papers.knn.npz (int32 indices,
+  float32 distances)
+- The UMAP input (embeddings + metadata features) is a different space, so UMAP
+  gets its own graph via precomputed_knn, and only for libraries of at least
+  UMAP_SMALL_DATA papers: below that UMAP computes exact distances and ignores it
+- api_server answers "papers similar to X" from the sidecar, without the model
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+N_NEIGHBORS = 15  # UMAP n_neighbors와 같게 (자기 자신 포함)
+UMAP_SMALL_DATA = 4096  # 이보다 작으면 UMAP이 전수 거리를 계산하고 precomputed_knn을 무시
+
+
+def knn_path(output: str) -> str:
+    """papers.json -> papers.knn.npz"""
+    return str(Path(output).with_suffix(".knn.npz"))
+
+
+def build_knn_graph(X: np.ndarray, n_neighbors: int = N_NEIGHBORS, random_state: int = 42) -> tuple:
+    """Approximate cosine kNN graph; row i starts with i itself
+
+    Returns (indices int32, distances float32, NNDescent index) or None if the
+    library is too small for a graph of this size.
+    """
+    if len(X) <= n_neighbors:
+        return None
+    from pynndescent import NNDescent
+
+    index = NNDescent(X, n_neighbors=n_neighbors, metric="cosine", random_state=random_state)
+    indices, distances = index.neighbor_graph
+    return indices.astype(np.int32), distances.astype(np.float32), index
+
+
+def save_knn_graph(path: str, indices: np.ndarray, distances: np.ndarray, keys: list):
+    """Write the graph sidecar; keys let readers check it matches papers.json"""
+    np.savez(path, indices=indices.astype(np.int32), distances=distances.astype(np.float32),
+             keys=np.array(keys, dtype=str))
+
+
+def load_knn_graph(path: str) -> dict:
+    """{"indices", "distances", "keys"} or None if the sidecar is missing"""
+    try:
+        with np.load(path) as data:
+            return {"indices": data["indices"], "distances": data["distances"], "keys": data["keys"].tolist()}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def similar_papers(graph: dict, paper_id: int, top_k: int = 10) -> list:
+    """[(neighbor_id, cosine_similarity)] for one paper, nearest first, without itself"""
+    neighbors = graph["indices"][paper_id]
+    distances = graph["distances"][paper_id]
+    return [(int(j), float(1.0 - d)) for j, d in zip(neighbors, distances)
+            if j != paper_id and j >= 0][:top_k]
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Persisted map model for incremental placement
+- Saves the fitted scalers, 2D reducer (UMAP/PCA) and KMeans after a full build
+- `build_map.py --place-new` projects only new papers with reducer.transform /
+  kmeans.predict, so existing papers keep their coordinates and clusters
+- Drift = papers added or removed since the model was fitted, relative to the
+  fitted library size; above the threshold build_map refits from scratch
+- Each fit gets a build id stored in the model and in papers.json meta.map_build_id;
+  the model is only reused when the previous papers.json came from that fit
+"""
+
+import json
+import uuid
+import pickle
+
+import joblib
+
+MODEL_VERSION = 2  # 2: build_id
+TRANSFORMABLE = ("umap", "pca")
+
+
+def new_build_id() -> str:
+    return uuid.uuid4().hex
+
+
+def save_map_model(path: str, build_id: str, embedding: str, dim_reduction: str, keys: list,
+                   scaler, emb_scaler, reducer, kmeans, cluster_ids: list):
+    """Write the fitted models plus the keys they were fitted on
+
+    cluster_ids[label] is the stable cluster ID of KMeans label `label`.
+    """
+    joblib.dump({
+        "version": MODEL_VERSION,
+        "build_id": build_id,
+        "embedding": embedding,
+        "dim_reduction": dim_reduction,
+        "keys": [k for k in keys if k],
+        "scaler": scaler,
+        "emb_scaler": emb_scaler,
+        "reducer": reducer,
+        "kmeans": kmeans,
+        "cluster_ids": [int(c) for c in cluster_ids],
+    }, path)
+
+
+def load_map_model(path: str, embedding: str, dim_reduction: str) -> dict:
+    """Load a map model usable for this build, or None (with the reason printed)"""
+    if dim_reduction not in TRANSFORMABLE:
+        print(f"  {dim_reduction} cannot place new points, doing full refit")
+        return None
+    try:
+        model = joblib.load(path)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        print(f"  No map model at {path}, doing full refit")
+        return None
+    if (model.get("version") != MODEL_VERSION or model.get("embedding") != embedding
+            or model.get("dim_reduction") != dim_reduction):
+        print("  Map model was fitted with different settings, doing full refit")
+        return None
+    return model
+
+
+def previous_positions(path: str) -> tuple:
+    """(meta.map_build_id, {zotero_key: (x, y, cluster)}) from the previous papers.json"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        return None, {}
+    if not isinstance(previous, dict):
+        return None, {}
+    positions = {
+        p["zotero_key"]: (p["x"], p["y"], p["cluster"]) for p in previous.get("papers", [])
+        if p.get("zotero_key") and "x" in p and "y" in p and "cluster" in p
+    }
+    return previous.get("meta", {}).get("map_build_id"), positions
+
+
+def map_drift(fitted_keys: list, keys: list) -> float:
+    """(added + removed) / fitted library size"""
+    fitted, current = set(fitted_keys), {k for k in keys if k}
+    return (len(current - fitted) + len(fitted - current)) / max(len(fitted), 1)
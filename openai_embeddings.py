@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+OpenAI embeddings client for build_map
+- Bounded concurrency (thread pool over 100-text batches)
+- Requests/tokens per minute limiter
+- Exponential backoff on 429 / 5xx / network errors (honours Retry-After)
+- Resumable: finished batches are checkpointed to a JSONL file
+- `dimensions` parameter for shorter stored vectors
+- `python openai_embeddings.py bench` measures throughput (e.g. against fake_embeddings_server.py)
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import requests
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Sliding one-minute window over requests and (estimated) tokens"""
+
+    def __init__(self, rpm: int = 3000, tpm: int = 1_000_000):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.events = deque()  # (timestamp, tokens)
+        self.tokens_in_window = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: int):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.events and now - self.events[0][0] >= 60:
+                    self.tokens_in_window -= self.events.popleft()[1]
+
+                fits_rpm = not self.rpm or len(self.events) < self.rpm
+                # 한 요청이 tpm보다 크면 창이 빌 때까지만 기다림
+                fits_tpm = not self.tpm or not self.events or self.tokens_in_window + tokens <= self.tpm
+                if fits_rpm and fits_tpm:
+                    self.events.append((now, tokens))
+                    self.tokens_in_window += tokens
+                    return
+                wait = 60 - (now - self.events[0][0])
+            time.sleep(min(max(wait, 0.01), 1.0))
+
+
+def parse_retry_after(value: str):
+    """Retry-After seconds (delta-seconds or HTTP-date), or None if unparseable"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def estimate_tokens(texts: list) -> int:
+    """Rough token count (~4 chars per token) for the limiter"""
+    return sum(len(t) for t in texts) // 4 + len(texts)
+
+
+class OpenAIEmbeddingClient:
+    """Concurrent, retrying client for the /embeddings endpoint"""
+
+    def __init__(self, model: str = "text-embedding-3-small", dimensions: int = None,
+                 concurrency: int = 4, rpm: int = 3000, tpm: int = 1_000_000,
+                 batch_size: int = 100, max_retries: int = 6,
+                 base_url: str = None, api_key: str = None, timeout: float = 60):
+        self.model = model
+        self.dimensions = dimensions
+        self.concurrency = max(1, concurrency)
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.base_url = (base_url or os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY", "")
+        self.timeout = timeout
+        self.limiter = RateLimiter(rpm, tpm)
+        self.session = requests.Session()
+        self.stats = {"requests": 0, "retries": 0, "resumed": 0}
+        self._stats_lock = threading.Lock()  # _request는 여러 스레드에서 호출됨
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _request(self, batch: list) -> list:
+        payload = {"model": self.model, "input": batch}
+        if self.dimensions:
+            payload["dimensions"] = self.dimensions
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(estimate_tokens(batch))
+            retry_after = None
+            try:
+                self._count("requests")
+                resp = self.session.post(f"{self.base_url}/embeddings", json=payload,
+                                         headers=headers, timeout=self.timeout)
+                if resp.status_code == 200:
+                    data = sorted(resp.json()["data"], key=lambda d: d["index"])
+                    return [d["embedding"] for d in data]
+                if resp.status_code not in RETRY_STATUS:
+                    raise RuntimeError(f"OpenAI embeddings error {resp.status_code}: {resp.text[:200]}")
+                error = f"HTTP {resp.status_code}"
+                retry_after = resp.headers.get("Retry-After")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+
+            if attempt == self.max_retries:
+                raise RuntimeError(f"OpenAI embeddings failed after {attempt + 1} attempts: {error}")
+
+            # 지수 백오프 + jitter (Retry-After 있으면 우선, 해석 못하면 백오프)
+            wait = parse_retry_after(retry_after)
+            if wait is None:
+                wait = min(60, 2 ** attempt) * (0.5 + random.random())
+            self._count("retries")
+            print(f"  {error}, retrying in {wait:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+            time.sleep(wait)
+
+    def _checkpoint_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}|{self.dimensions}|{text}".encode("utf-8")).hexdigest()
+
+    def embed(self, texts: list, checkpoint_path: str = None) -> np.ndarray:
+        """Embed texts; returns (len(texts), dim) in input order
+
+        With checkpoint_path, finished batches are appended there and reused
+        if the run is interrupted and restarted. The file is removed on success.
+        """
+        done = {}
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # 중단 시점에 잘린 마지막 줄
+                    done[entry["k"]] = entry["e"]
+
+        keys = [self._checkpoint_key(t) for t in texts]
+        pending = [i for i, k in enumerate(keys) if k not in done]
+        self.stats["resumed"] = len(texts) - len(pending)
+        if self.stats["resumed"]:
+            print(f"  Resuming: {self.stats['resumed']} texts already embedded")
+
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        lock = threading.Lock()
+        checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+        finished = len(texts) - len(pending)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                futures = {executor.submit(self._request, [texts[i] for i in batch]): batch for batch in batches}
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    vectors = future.result()
+                    with lock:
+                        for i, vec in zip(batch, vectors):
+                            done[keys[i]] = vec
+                            if checkpoint:
+                                checkpoint.write(json.dumps({"k": keys[i], "e": vec}) + "\n")
+                        if checkpoint:
+                            checkpoint.flush()
+                    finished += len(batch)
+                    print(f"  Processed {finished}/{len(texts)}")
+        finally:
+            if checkpoint:
+                checkpoint.close()
+
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return np.array([done[k] for k in keys], dtype=np.float32)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI embeddings client benchmark")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("--base-url", default="http://localhost:8765/v1",
+                        help="Embeddings API base URL (default: fake_embeddings_server.py)")
+    parser.add_argument("--model", default="text-embedding-3-small")
+    parser.add_argument("--dimensions", type=int, default=None)
+    parser.add_argument("--n", type=int, default=5000, help="Number of texts")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--rpm", type=int, default=3000)
+    parser.add_argument("--tpm", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    texts = [f"Benchmark text {i}: " + "lorem ipsum dolor sit amet " * (5 + i % 40) for i in range(args.n)]
+    for concurrency in args.concurrency:
+        client = OpenAIEmbeddingClient(args.model, args.dimensions, concurrency=concurrency,
+                                       rpm=args.rpm, tpm=args.tpm, base_url=args.base_url, api_key="bench")
+        start = time.perf_counter()
+        vectors = client.embed(texts)
+        elapsed = time.perf_counter() - start
+        print(f"concurrency={concurrency}: {len(texts) / elapsed:.0f} texts/s, {elapsed:.1f}s, "
+              f"dim={vectors.shape[1]}, requests={client.stats['requests']}, retries={client.stats['retries']}")
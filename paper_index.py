@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Process-wide, read-only view of papers.json for api_server
+- Parsed once; afterwards each access is a stat() of papers.json. Only when
+  mtime/size change is the file re-read, and only when its content hash
+  changed is it re-parsed. The embedding sidecar is immutable per build
+  (meta.embedding_sidecar_id), so papers.json alone decides what is loaded
+- A reload builds a complete new snapshot and swaps one reference, so requests
+  never see a half-updated index
+- Snapshot: records (embedding fields stripped), L2-normalised float32 chunk
+  matrix + per-paper offsets (see hybrid_search.py), and doi / s2_id lookups
+  (citation sync). A float32 sidecar is already normalised and is searched
+  straight from the mmap (no copy)
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from embedding_codec import decode_vectors
+from embedding_store import load_sidecar
+from hybrid_search import normalize_rows
+
+EMBEDDING_FIELDS = ("embedding", "embeddings")
+
+
+class PaperSnapshot:
+    """One immutable parse of papers.json"""
+
+    def __init__(self, data, papers_path: str):
+        if isinstance(data, list):  # 기존 포맷 (배열만)
+            data = {"papers": data}
+        self.meta = data.get("meta", {})
+        self.cluster_labels = data.get("cluster_labels", {})
+
+        raw_papers = data.get("papers", [])
+        self.papers = [{k: v for k, v in p.items() if k not in EMBEDDING_FIELDS} for p in raw_papers]
+        self.by_doi = {p["doi"].lower(): p for p in self.papers if p.get("doi")}
+        self.by_s2 = {p["s2_id"]: p for p in self.papers if p.get("s2_id")}
+
+        self.multi_vector = False
+        self.embeddings, self.offsets = None, None
+        if self.meta.get("embedding_store") == "sidecar":
+            self.multi_vector = self.meta.get("embedding") == "multi"
+            vectors, offsets, norms = load_sidecar(papers_path, self.meta.get("embedding_sidecar_id"),
+                                                   len(self.papers))
+            if vectors is not None:
+                self.offsets = offsets
+                if norms is None:
+                    # 정규화 전 (id 없는) 예전 사이드카: 한 번 정규화해서 메모리에 둠
+                    self.embeddings = normalize_rows(vectors)
+                elif vectors.dtype != np.float32:
+                    # float16은 검색마다 float32로 변환되지 않도록 한 번만 변환 (크기 대신 메모리)
+                    self.embeddings = np.asarray(vectors, dtype=np.float32)
+                else:
+                    self.embeddings = vectors
+        else:
+            self.multi_vector = any(p.get("embeddings") for p in raw_papers)
+            field = "embeddings" if self.multi_vector else "embedding"
+            blocks = [np.atleast_2d(decode_vectors(p[field])) if p.get(field) else None for p in raw_papers]
+            dims = {b.shape[1] for b in blocks if b is not None}
+            if dims:
+                dim = dims.pop()
+                blocks = [b if b is not None else np.zeros((0, dim), dtype=np.float32) for b in blocks]
+                self.offsets = np.zeros(len(blocks) + 1, dtype=np.int64)
+                self.offsets[1:] = np.cumsum([len(b) for b in blocks])
+                # 검색 때마다 정규화하지 않도록 로드 시 한 번만
+                self.embeddings = normalize_rows(np.vstack(blocks))
+
+    def has_embeddings(self, paper_id: int) -> bool:
+        return self.offsets is not None and self.offsets[paper_id + 1] > self.offsets[paper_id]
+
+    def paper_vectors(self, paper_id: int) -> np.ndarray:
+        """(n_chunks, dim) normalised float32 vectors of one paper"""
+        return self.embeddings[self.offsets[paper_id]:self.offsets[paper_id + 1]]
+
+
+class PaperIndex:
+    """Hot-reloading holder of the current PaperSnapshot"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._signature = None
+        self._digest = None
+        self.reloads = 0
+
+    def _stat_signature(self) -> tuple:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def get(self) -> PaperSnapshot:
+        """Current snapshot, reloading first if papers.json changed on disk
+
+        Raises FileNotFoundError if papers.json does not exist.
+        """
+        signature = self._stat_signature()
+        if signature == self._signature and self._snapshot is not None:
+            return self._snapshot
+
+        with self._lock:
+            if signature != self._signature or self._snapshot is None:
+                if signature is None:
+                    raise FileNotFoundError(f"{self.path} not found. Run build_map.py first.")
+                raw = Path(self.path).read_bytes()
+                digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+                # 내용이 같으면 (touch 등) 다시 파싱하지 않음
+                if digest != self._digest or self._snapshot is None:
+                    try:
+                        data = json.loads(raw)
+                    except ValueError:
+                        # 쓰는 도중에 읽은 경우: 이전 스냅샷을 계속 쓰고 다음 요청에서 다시 시도
+                        if self._snapshot is None:
+                            raise
+                        return self._snapshot
+                    self._snapshot = PaperSnapshot(data, self.path)
+                    self._digest = digest
+                    self.reloads += 1
+                self._signature = signature
+            return self._snapshot
+
+    def load_mutable(self) -> dict:
+        """Fresh, private parse of papers.json for read-modify-write jobs
+
+        Writers must not mutate the shared snapshot (and it has no embeddings).
+        """
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
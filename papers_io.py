@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Single writer for papers.json
+- Compact separators (no indent)
+- Each file is written to a temp file and swapped in with os.replace, so readers
+  never see a half-written file
+- papers.json stays next to the sidecars for api_server and the scripts; the copy
+  nginx serves goes to data/papers.json with precompressed .gz and .br beside it
+  for gzip_static / brotli_static (.br needs `pip install brotli`; skipped
+  otherwise). docker-compose mounts only data/, not the project (.env, sidecars)
+- The .gz/.br are swapped in before data/papers.json, so nginx never serves an
+  old .gz next to a new papers.json. Failing to write them only warns (and
+  removes the old ones)
+- `python papers_io.py report` compares size, transfer and parse time before/after
+"""
+
+import os
+import gzip
+import json
+import time
+import argparse
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPACT = {"ensure_ascii": False, "separators": (",", ":")}
+PUBLIC_DIR = "data"  # nginx에 마운트되는 디렉터리 (서빙할 파일만)
+
+
+def public_path(path) -> str:
+    """papers.json -> data/papers.json (the copy nginx serves)"""
+    path = Path(path)
+    return str(path.parent / PUBLIC_DIR / path.name)
+
+
+def _write(path: str, data: bytes):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_papers_json(path, data) -> dict:
+    """Write papers.json compactly plus the served copy and its .gz/.br; returns {path: bytes}"""
+    path = str(path)
+    raw = json.dumps(data, **COMPACT).encode("utf-8")
+    public = public_path(path)
+    os.makedirs(os.path.dirname(public), exist_ok=True)
+    sizes = {}
+
+    # 압축본을 먼저 교체: gzip_static이 새 papers.json 옆의 이전 .gz를 서빙하지 않도록
+    try:
+        gz = gzip.compress(raw, compresslevel=9, mtime=0)
+        _write(f"{public}.gz", gz)
+        sizes[f"{public}.gz"] = len(gz)
+
+        if brotli is not None:
+            br = brotli.compress(raw, quality=11)
+            _write(f"{public}.br", br)
+            sizes[f"{public}.br"] = len(br)
+        elif os.path.exists(f"{public}.br"):
+            os.remove(f"{public}.br")  # 이전 내용의 .br이 남지 않도록
+    except OSError as e:
+        # 압축본은 전송 최적화일 뿐: 실패해도 빌드의 나머지(사이드카 등)는 계속
+        print(f"⚠️  Could not write precompressed copies of {public}: {e}")
+        # 이전 내용의 압축본이 새 papers.json 대신 서빙되지 않도록
+        for stale in (f"{public}.gz", f"{public}.br"):
+            if stale not in sizes and os.path.isfile(stale):
+                os.remove(stale)
+
+    _write(public, raw)
+    sizes[public] = len(raw)
+    _write(path, raw)
+    sizes[path] = len(raw)
+    return sizes
+
+
+def size_report(path: str, mbps: float = 1.6) -> list:
+    """Bytes, transfer time at `mbps` and decode (decompress + parse) time per encoding"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    before = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    compact = json.dumps(data, **COMPACT).encode("utf-8")
+    # (이름, 전송 바이트, 브라우저가 하는 디코딩)
+    variants = [
+        ("indent=2 (before)", before, json.loads),
+        ("indent=2 + gzip -6 (before, nginx on the fly)", gzip.compress(before, 6),
+         lambda p: json.loads(gzip.decompress(p))),
+        ("compact", compact, json.loads),
+        ("compact + gzip -9 (gzip_static)", gzip.compress(compact, 9),
+         lambda p: json.loads(gzip.decompress(p))),
+    ]
+    if brotli is not None:
+        variants.append(("compact + brotli 11 (brotli_static)", brotli.compress(compact, quality=11),
+                         lambda p: json.loads(brotli.decompress(p))))
+
+    rows = []
+    for name, payload, decode in variants:
+        start = time.perf_counter()
+        decode(payload)
+        rows.append({
+            "variant": name,
+            "bytes": len(payload),
+            "transfer_s": len(payload) * 8 / (mbps * 1_000_000),
+            "decode_ms": (time.perf_counter() - start) * 1000,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="papers.json size/latency report")
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("--papers", default="papers.json")
+    parser.add_argument("--mbps", type=float, default=1.6, help="Link speed for the transfer estimate (1.6 = slow 3G)")
+    args = parser.parse_args()
+
+    rows = size_report(args.papers, args.mbps)
+    base = rows[0]["bytes"]
+    print(f"{'variant':<48} {'size':>10} {'ratio':>7} {'@' + str(args.mbps) + 'Mbps':>10} {'decode':>9}")
+    for r in rows:
+        print(f"{r['variant']:<48} {r['bytes'] / 1024:>8.0f}KB {r['bytes'] / base:>6.1%} "
+              f"{r['transfer_s']:>9.2f}s {r['decode_ms']:>7.0f}ms")
+    if brotli is None:
+        print("(brotli not installed: pip install brotli)")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Query embedding cache for semantic search
+- Bounded LRU of normalised query vectors keyed by (model, query)
+- Single-flight: concurrent misses for the same key wait on one encode
+  instead of each running the model
+- Hit / miss / coalesced counters for /api/semantic-search/stats
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+DEFAULT_SIZE = 1024
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU + single-flight around an encode(query) -> vector callable"""
+
+    def __init__(self, maxsize: int = DEFAULT_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0  # 다른 요청이 인코딩 중이라 결과를 기다린 횟수
+
+    def get(self, model: str, query: str, encode):
+        """Cached vector for (model, query); encode(query) runs once per miss"""
+        key = (model, query)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            vector = encode(query)
+        except BaseException as e:
+            # 실패는 캐시하지 않음: 기다리던 요청에만 전달
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        vector.setflags(write=False)  # 여러 요청이 공유하므로 읽기 전용
+
+        with self._lock:
+            if self.maxsize > 0:
+                self._entries[key] = vector
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            del self._inflight[key]
+        future.set_result(vector)
+        return vector
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }